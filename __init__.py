@@ -18,7 +18,7 @@ USAGE:
         from langchain_core.messages import HumanMessage
 
         agent = create_reflection_agent()
-        messages = agent.invoke([HumanMessage("Question")])
+        result = await agent.ainvoke({"messages": [HumanMessage("Question")]})
 """
 
 # ============================================================================
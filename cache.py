@@ -0,0 +1,502 @@
+"""
+Semantic Search Cache for Reflection Agent
+
+WHY THIS FILE:
+- The agent often searches the same thing twice (across runs, and across
+  revision iterations of the same run)
+- Each DuckDuckGo call costs hundreds of ms and counts toward rate limits
+- A cache in front of the search tool skips repeat searches entirely
+
+WHY "SEMANTIC":
+An exact-match cache misses near-duplicates like
+  "intermittent fasting RCT 2023" vs "2023 RCTs on intermittent fasting"
+So instead of matching strings, we match MEANING:
+1. Turn each query into a vector (embedding) with a small local model
+2. Compare the new query's vector to every cached query's vector
+3. If the closest one is similar enough (cosine >= threshold) -> cache hit
+
+WHY AN EXACT-MATCH FAST PATH:
+Re-runs of the same question (dev loop, retries) repeat queries word for
+word. A dict keyed by the normalized text ("  IF RCT " -> "if rct")
+answers those without even running the embedding model.
+
+HOW IT'S STORED:
+- One preallocated numpy matrix (max_entries rows) holding the cached
+  query vectors, L2-normalized at insert time; the first len(cache)
+  rows are in use
+- Parallel Python lists with the results and timestamps
+- LRU eviction when full, TTL so stale results expire
+- Pickled to disk on exit so the next run starts warm
+
+WHY LSH (for big caches):
+Comparing against EVERY cached vector costs O(N) per lookup.
+Locality-sensitive hashing buckets similar vectors together, so a lookup
+only checks the handful of vectors that landed in the same buckets.
+"""
+
+import atexit
+import logging
+import os
+import pickle
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+
+from config import (
+    SEMANTIC_CACHE_MODEL,
+    SEMANTIC_CACHE_QUANTIZED,
+    SEMANTIC_CACHE_ONNX_FILE,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_TTL,
+    SEMANTIC_CACHE_PATH,
+    SEMANTIC_CACHE_LSH_TABLES,
+    SEMANTIC_CACHE_LSH_BITS,
+    SEMANTIC_CACHE_LSH_MIN_ENTRIES,
+)
+
+
+log = logging.getLogger(__name__)
+
+
+# ============================================================================
+# LSH INDEX
+# ============================================================================
+
+class LSHIndex:
+    """
+    Random-projection LSH for cosine similarity
+
+    HOW IT WORKS:
+    - Each table has `bits` random hyperplanes (a gaussian (dim, bits) matrix R)
+    - A vector's signature = which side of each hyperplane it's on:
+      np.sign(v @ R) -> 12 bits -> one int bucket key
+    - Similar vectors (small angle) usually get the same signature
+    - Several tables are used so a near-duplicate only has to collide in ONE
+
+    A lookup returns candidate ids; the caller does the exact cosine check.
+    """
+
+    def __init__(self, dim: int, num_tables: int = 8, bits: int = 12, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((num_tables, dim, bits)).astype(np.float32)
+        self._powers = 1 << np.arange(bits, dtype=np.int64)
+        self._tables: List[Dict[int, Set[int]]] = [{} for _ in range(num_tables)]
+        self._keys: Dict[int, np.ndarray] = {}
+
+    def _signature(self, v: np.ndarray) -> np.ndarray:
+        """One bucket key per table"""
+        bits = np.einsum("d,tdb->tb", v, self._planes) > 0
+        return bits.astype(np.int64) @ self._powers
+
+    def add(self, item_id: int, v: np.ndarray) -> None:
+        keys = self._signature(v)
+        self._keys[item_id] = keys
+        for table, key in zip(self._tables, keys.tolist()):
+            table.setdefault(key, set()).add(item_id)
+
+    def remove(self, item_id: int) -> None:
+        keys = self._keys.pop(item_id)
+        for table, key in zip(self._tables, keys.tolist()):
+            bucket = table[key]
+            bucket.discard(item_id)
+            if not bucket:
+                del table[key]
+
+    def move(self, old_id: int, new_id: int) -> None:
+        """Relabel an item (used when the cache compacts its rows)"""
+        keys = self._keys.pop(old_id)
+        self._keys[new_id] = keys
+        for table, key in zip(self._tables, keys.tolist()):
+            bucket = table[key]
+            bucket.discard(old_id)
+            bucket.add(new_id)
+
+    def query(self, v: np.ndarray) -> List[int]:
+        """Ids sharing a bucket with v in at least one table"""
+        candidates: Set[int] = set()
+        for table, key in zip(self._tables, self._signature(v).tolist()):
+            candidates.update(table.get(key, ()))
+        return list(candidates)
+
+
+# ============================================================================
+# SEMANTIC CACHE
+# ============================================================================
+
+class SemanticCache:
+    """
+    In-memory LRU + TTL cache keyed by query embedding
+
+    USAGE:
+        cache = SemanticCache()
+        result = cache.get("intermittent fasting RCT 2023")
+        if result is None:
+            result = search_tool.invoke(query)
+            cache.put(query, result)
+
+    WHY LAZY MODEL LOADING:
+    sentence-transformers pulls in torch, which takes seconds to import.
+    The encoder is only loaded on the first get/put, not at import time.
+
+    WHY QUANTIZED:
+    With quantized=True the model runs through ONNX Runtime with int8
+    weights (about twice the CPU throughput of FP32). Without the ONNX
+    extras installed it quietly falls back to the FP32 model.
+
+    LOOKUP STRATEGY:
+    - Small cache: exact cosine against every row
+      (rows are unit vectors, so it's ONE matrix-vector product:
+       M[:n] @ q -> a single BLAS sgemv call)
+    - Once it holds >= lsh_min_entries: LSH picks candidates first,
+      exact cosine only on those
+
+    THREAD SAFETY:
+    The agent calls get/put/embed from worker threads (asyncio.to_thread,
+    so encoding never blocks the event loop). One lock serializes them.
+
+    IF THE MODEL CAN'T LOAD:
+    The first failure is raised (so the caller can log it ONCE) and the
+    cache turns itself off: enabled = False, get() returns None and
+    put() does nothing for the rest of the process - no repeated import
+    attempts or model downloads on every search.
+    """
+
+    # Vectors kept for missed queries awaiting their put() (oldest dropped)
+    MAX_PENDING = 256
+
+    def __init__(
+        self,
+        model_name: str = SEMANTIC_CACHE_MODEL,
+        quantized: bool = SEMANTIC_CACHE_QUANTIZED,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl: float = SEMANTIC_CACHE_TTL,
+        path: Optional[str] = None,
+        lsh_min_entries: int = SEMANTIC_CACHE_LSH_MIN_ENTRIES,
+    ):
+        self.model_name = model_name
+        self.quantized = quantized
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.lsh_min_entries = lsh_min_entries
+
+        self._encoder = None
+
+        # Set to False if the embedding model fails to load
+        self.enabled = True
+
+        # Built when the first vector arrives (needs the embedding size)
+        self._index: Optional[LSHIndex] = None
+
+        # Row i of _vectors belongs to _queries[i], _results[i], ...
+        # Allocated with max_entries rows on first insert; rows are unit length
+        self._vectors: Optional[np.ndarray] = None
+        self._queries: List[str] = []
+        self._results: List[Any] = []
+        self._created: List[float] = []
+        self._last_used: List[float] = []
+
+        # Vectors computed by a missed get(), reused by the matching put()
+        self._pending: Dict[str, np.ndarray] = {}
+
+        # Exact-match fast path: {normalized query: row}
+        self._exact: Dict[str, int] = {}
+
+        # Guards everything above (get/put/embed run in worker threads)
+        self._lock = threading.RLock()
+
+        if path:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    # ------------------------------------------------------------------------
+    # Embedding
+    # ------------------------------------------------------------------------
+
+    def _model(self):
+        """The sentence-transformers model, loaded on first use"""
+        if not self.enabled:
+            raise RuntimeError("semantic cache disabled: embedding model unavailable")
+        if self._encoder is None:
+            try:
+                self._encoder = self._load_model()
+            except Exception:
+                self.enabled = False  # Don't retry the import/download per call
+                raise
+        return self._encoder
+
+    def _load_model(self):
+        """Load the int8 ONNX encoder, or the FP32 model as a fallback"""
+        from sentence_transformers import SentenceTransformer
+        if self.quantized:
+            try:
+                encoder = SentenceTransformer(
+                    self.model_name,
+                    backend="onnx",
+                    model_kwargs={
+                        "file_name": SEMANTIC_CACHE_ONNX_FILE,
+                        "provider": "CPUExecutionProvider",
+                    },
+                )
+                log.info("Loaded int8 ONNX encoder %s", SEMANTIC_CACHE_ONNX_FILE)
+                return encoder
+            except Exception as e:  # ONNX extras missing / file not found
+                # WARNING, not INFO: a wrong file name would otherwise
+                # silently cost the whole speedup on every run
+                log.warning(
+                    "Quantized encoder %s unavailable (%s); using FP32",
+                    SEMANTIC_CACHE_ONNX_FILE, e,
+                )
+        return SentenceTransformer(self.model_name)
+
+    def _encode(self, text: str) -> np.ndarray:
+        """Embed one string as a unit-length float32 vector"""
+        v = np.asarray(self._model().encode(text), dtype=np.float32)
+        return v / np.linalg.norm(v)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed several strings in one batch -> (len(texts), dim) float32 matrix
+
+        WHY PUBLIC:
+        Lets other code (e.g. reference deduplication in nodes.py) reuse
+        the already-loaded model instead of loading a second copy.
+        """
+        with self._lock:
+            return np.asarray(self._model().encode(texts), dtype=np.float32)
+
+    # ------------------------------------------------------------------------
+    # Lookup / insert
+    # ------------------------------------------------------------------------
+
+    @staticmethod
+    def _exact_key(query: str) -> str:
+        """Normalize case and whitespace: "  IF  RCT " -> "if rct" """
+        return " ".join(query.lower().split())
+
+    def get(self, query: str) -> Optional[Any]:
+        """
+        Return the cached result for the most similar query, or None
+
+        HOW:
+        First try an exact match on the normalized text (no model needed).
+        Otherwise: rows and q are unit vectors, so cosine = M·q for the candidate rows
+        in ONE matrix-vector product (no per-row norms at lookup time),
+        then argmax. Hit only if the best score >= threshold and not expired.
+        Candidates = every row, or only the LSH bucket-mates for big caches.
+        """
+
+        if not self.enabled:
+            return None
+        with self._lock:
+            return self._get(query)
+
+    def _get(self, query: str) -> Optional[Any]:
+        n = len(self._results)
+        if not n:
+            return None
+
+        now = time.time()
+        row = self._exact.get(self._exact_key(query))
+        if row is not None:
+            if now - self._created[row] <= self.ttl:
+                self._last_used[row] = now
+                return self._results[row]
+            self._remove(row)
+            n -= 1
+            if not n:
+                return None
+
+        q = self._encode(query)
+
+        if len(self._results) >= self.lsh_min_entries:
+            candidates = self._index.query(q)
+            if not candidates:
+                self._remember_miss(query, q)
+                return None
+            rows = self._vectors[candidates]
+        else:
+            candidates = None
+            rows = self._vectors[:n]
+
+        scores = rows @ q
+        best = int(np.argmax(scores))
+        score = scores[best]
+        if candidates is not None:
+            best = candidates[best]
+
+        if score < self.threshold:
+            self._remember_miss(query, q)
+            return None
+        if now - self._created[best] > self.ttl:
+            self._remove(best)
+            self._remember_miss(query, q)
+            return None
+
+        self._last_used[best] = now
+        return self._results[best]
+
+    def put(self, query: str, result: Any) -> None:
+        """Cache a search result under the query's embedding"""
+
+        if not self.enabled:
+            return
+        with self._lock:
+            self._put(query, result)
+
+    def discard(self, query: str) -> None:
+        """Forget the vector kept by a miss whose search failed (no put follows)"""
+
+        with self._lock:
+            self._pending.pop(query, None)
+
+    def _remember_miss(self, query: str, q: np.ndarray) -> None:
+        """Keep the miss's vector for put(), dropping the oldest past MAX_PENDING"""
+        self._pending.pop(query, None)
+        if len(self._pending) >= self.MAX_PENDING:
+            del self._pending[next(iter(self._pending))]
+        self._pending[query] = q
+
+    def _put(self, query: str, result: Any) -> None:
+        q = self._pending.pop(query, None)
+        if q is None:
+            q = self._encode(query)
+
+        if len(self._results) >= self.max_entries:
+            # Evict the least recently used entry
+            self._remove(int(np.argmin(self._last_used)))
+
+        # Preallocate once instead of copying the matrix on every insert
+        if self._vectors is None:
+            self._vectors = np.empty((self.max_entries, q.shape[0]), dtype=np.float32)
+
+        now = time.time()
+        self._vectors[len(self._results)] = q
+        self._add_to_index(len(self._results), q)
+        self._exact[self._exact_key(query)] = len(self._results)
+        self._queries.append(query)
+        self._results.append(result)
+        self._created.append(now)
+        self._last_used.append(now)
+
+    def _add_to_index(self, index: int, q: np.ndarray) -> None:
+        if self._index is None:
+            self._index = LSHIndex(
+                dim=q.shape[0],
+                num_tables=SEMANTIC_CACHE_LSH_TABLES,
+                bits=SEMANTIC_CACHE_LSH_BITS,
+            )
+        self._index.add(index, q)
+
+    def _remove(self, index: int) -> None:
+        """
+        Drop one entry by moving the LAST entry into its slot
+
+        WHY SWAP INSTEAD OF DELETE:
+        Deleting from the middle would shift every later row id and
+        invalidate the LSH buckets. Swapping keeps all other ids stable.
+        """
+
+        last = len(self._results) - 1
+        self._index.remove(index)
+        self._unmap_exact(index)
+        if index != last:
+            self._index.move(last, index)
+            self._unmap_exact(last)
+            self._exact[self._exact_key(self._queries[last])] = index
+            self._vectors[index] = self._vectors[last]
+            for items in (self._queries, self._results, self._created, self._last_used):
+                items[index] = items[last]
+
+        # Row `last` is now unused (the buffer itself keeps its size)
+        for items in (self._queries, self._results, self._created, self._last_used):
+            items.pop()
+
+    def _unmap_exact(self, index: int) -> None:
+        """Forget the exact-match entry pointing at row `index` (if any)"""
+        key = self._exact_key(self._queries[index])
+        if self._exact.get(key) == index:
+            del self._exact[key]
+
+    # ------------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------------
+
+    def save(self) -> None:
+        """Pickle the cache to self.path (called automatically on exit)"""
+
+        if not self.path or not self._results:
+            return
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock, open(self.path, "wb") as f:
+            pickle.dump({
+                "model_name": self.model_name,
+                "vectors": self._vectors[:len(self._results)],
+                "queries": self._queries,
+                "results": self._results,
+                "created": self._created,
+                "last_used": self._last_used,
+            }, f)
+
+    def load(self) -> None:
+        """Restore a pickled cache, dropping entries that have expired"""
+
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+        except Exception:
+            return  # Corrupt/old cache file: just start cold
+
+        # Vectors from a different model aren't comparable
+        if data.get("model_name") != self.model_name:
+            return
+
+        now = time.time()
+        keep = [i for i, created in enumerate(data["created"]) if now - created <= self.ttl]
+        keep = keep[-self.max_entries:]
+        if not keep:
+            return
+
+        # Normalize on load too (older cache files stored raw vectors)
+        vectors = np.asarray(data["vectors"][keep], dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        self._vectors = np.empty((self.max_entries, vectors.shape[1]), dtype=np.float32)
+        self._vectors[:len(keep)] = vectors
+
+        self._queries = [data["queries"][i] for i in keep]
+        self._results = [data["results"][i] for i in keep]
+        self._created = [data["created"][i] for i in keep]
+        self._last_used = [data["last_used"][i] for i in keep]
+
+        # The indexes aren't pickled; rebuild them
+        for i, v in enumerate(vectors):
+            self._add_to_index(i, v)
+        self._exact = {self._exact_key(q): i for i, q in enumerate(self._queries)}
+
+
+# ============================================================================
+# SHARED INSTANCE
+# ============================================================================
+
+# One cache for the whole process, warm-started from disk
+# WHY atexit: persist whatever we learned this run for the next one
+search_cache = SemanticCache(path=SEMANTIC_CACHE_PATH)
+atexit.register(search_cache.save)
+
+
+# ============================================================================
+# EXPORTS
+# ============================================================================
+
+__all__ = ['LSHIndex', 'SemanticCache', 'search_cache']
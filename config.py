@@ -12,6 +12,8 @@ WHAT IT CONTAINS:
 - Max iterations (how many revision cycles)
 """
 
+import os
+
 from dotenv import load_dotenv
 
 # Load environment variables from .env.dev
@@ -46,13 +48,111 @@ TEMPERATURE = 0.7
 # Each iteration = 3 LLM calls + searches
 MAX_ITERATIONS = 2
 
+# Stop early when the self-critique finds (almost) nothing missing
+# WHY: If reflection.missing is blank or shorter than this many characters,
+# another search + revision round has nothing to fill in - skip it
+MIN_REFLECTION_CHARS = 20
+
+# Split a revision round into parallel branches (1 = off)
+# WHY: When the queries cover different gaps, each branch researches and
+# revises for its own slice AT THE SAME TIME, then one call merges the drafts
+# OPT-IN: every branch is its own revise call PLUS a serial merge call, so
+# N branches cost N + 1 LLM calls instead of 1 and add a round-trip to the
+# critical path. Turn it on only when rounds have many queries and smaller
+# per-branch prompts are worth the extra calls
+PARALLEL_REVISION_BRANCHES = 1
+
+# LLM requests in flight at once for the *_batch node helpers
+# (generate_initial_response_batch / revise_answer_batch in nodes.py)
+# WHY: Batched calls overlap their network waits; the cap keeps a large
+# sweep under Gemini's per-minute quota
+MAX_PARALLEL_REQUESTS = 10
+
+# Questions run at the same time by run_agents() (batch mode)
+# WHY: Overlaps one run's LLM wait with another's searches,
+# while keeping bursts under Gemini's per-minute quota
+BATCH_MAX_CONCURRENCY = 8
+
 # Number of search results per query
 # WHY: More results = better research but more tokens/cost
 MAX_SEARCH_RESULTS = 3
 
-# Maximum characters per search result
-# WHY: Prevent token overload while keeping useful info
-SEARCH_RESULT_LIMIT = 800
+# Maximum TOKENS of search results per QUERY (shared by all its hits,
+# titles and URLs included)
+# WHY: Prevent token overload while keeping useful info. Counting tokens
+# (not characters) bounds what the revise call is billed for, even for
+# dense text like URLs, code or non-Latin scripts.
+# 200 tokens is about 800 characters of English prose
+SEARCH_RESULT_TOKEN_LIMIT = 200
+
+# Tokenizer used to count snippet tokens (tiktoken encoding name)
+# Gemini's own tokenizer isn't available offline; cl100k_base is a close
+# stand-in. Falls back to ~4 characters per token if it can't be loaded.
+SEARCH_RESULT_TOKENIZER = "cl100k_base"
+
+# Maximum number of searches running at the same time (process-wide,
+# enforced in tools.py - shared by every node and every concurrent run)
+# WHY: Queries run concurrently, but DuckDuckGo rate-limits bursts
+MAX_CONCURRENT_SEARCHES = 3
+
+
+# Retries when DuckDuckGo rate-limits us (HTTP 429-style errors)
+# WHY: A short randomized wait usually clears the limit
+SEARCH_MAX_RETRIES = 3
+SEARCH_BACKOFF_SECONDS = 1.0  # First retry waits up to 1s, then 2s, 4s...
+
+
+# ============================================================================
+# SEARCH CACHE
+# ============================================================================
+
+# Reuse results for queries that MEAN the same thing as an earlier one
+# WHY: Skips repeat DuckDuckGo calls (latency + rate limits)
+SEMANTIC_CACHE_ENABLED = True
+
+# Local embedding model used to compare queries (small and fast on CPU)
+SEMANTIC_CACHE_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Run the embedding model as an int8-quantized ONNX model on CPU
+# WHY: int8 weights move half the memory per token and use the CPU's
+# integer dot-product units -> roughly 2x faster encoding, same vectors
+# to within rounding. Falls back to the normal FP32 model if the ONNX
+# extras (pip install "sentence-transformers[onnx]") aren't installed.
+SEMANTIC_CACHE_QUANTIZED = True
+
+# Which pre-quantized ONNX file to load from the model repo
+# The AVX2 export is UNSIGNED int8 ("quint8"); the signed ones are
+# model_qint8_avx512.onnx, model_qint8_avx512_vnni.onnx (faster on CPUs
+# with AVX-512 VNNI) and model_qint8_arm64.onnx
+SEMANTIC_CACHE_ONNX_FILE = "onnx/model_quint8_avx2.onnx"
+
+# Minimum cosine similarity to count as "the same query"
+# WHY: Too low = wrong results reused, too high = near-duplicates miss
+SEMANTIC_CACHE_THRESHOLD = 0.9
+
+# Maximum cached queries (least recently used are evicted first)
+SEMANTIC_CACHE_MAX_ENTRIES = 10_000
+
+# Seconds before a cached result is considered stale (24 hours)
+SEMANTIC_CACHE_TTL = 24 * 60 * 60
+
+# LSH (locality-sensitive hashing) lookup for large caches
+# WHY: Past this many entries, checking every cached query gets slow;
+# LSH narrows each lookup to a few candidates in the same hash buckets
+SEMANTIC_CACHE_LSH_MIN_ENTRIES = 1024
+SEMANTIC_CACHE_LSH_TABLES = 8   # More tables = fewer missed near-duplicates
+SEMANTIC_CACHE_LSH_BITS = 12    # More bits = smaller, stricter buckets
+
+# Minimum cosine similarity for two references to count as duplicates
+# WHY: Revisions often cite the same source twice ("Smith 2023" vs
+# "Smith et al., 2023"); dropping repeats saves tokens next iteration.
+# Reuses the cache's embedding model (only when the cache is enabled).
+# Applies to citation TEXT only: URLs are compared exactly (normalized),
+# since /article/123 and /article/456 look alike but are different sources
+REFERENCE_DEDUPE_THRESHOLD = 0.92
+
+# Where the cache is saved between runs
+SEMANTIC_CACHE_PATH = os.path.expanduser("~/.cache/reflection_agent/semantic_cache.pkl")
 
 
 # ============================================================================
@@ -61,4 +161,6 @@ SEARCH_RESULT_LIMIT = 800
 
 # Show progress messages during execution
 # WHY: Helps debug and understand what the agent is doing
+# Progress is logged at DEBUG on the "nodes" logger; this sets that level
+# (you still need a handler, e.g. logging.basicConfig() - main.py adds one)
 VERBOSE = True
\ No newline at end of file
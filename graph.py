@@ -20,20 +20,30 @@ Like planning a road trip:
 - State = your car with luggage (carries everything with you)
 """
 
-from langgraph.graph import MessageGraph, END
+from functools import lru_cache
 
+from langgraph.graph import StateGraph, START, END
+
+from config import MAX_ITERATIONS
 from nodes import (
     generate_initial_response,
+    prefetch_search,
     execute_tools,
     revise_answer,
+    revise_branch,
+    merge_revisions,
+    dispatch_start,
+    after_search,
     should_continue
 )
+from state import AgentState
 
 
 # ============================================================================
 # GRAPH CREATION FUNCTION
 # ============================================================================
 
+@lru_cache(maxsize=1)
 def create_reflection_agent():
     """
     Build the Reflection Agent workflow
@@ -41,33 +51,45 @@ def create_reflection_agent():
     RETURNS:
     - Compiled LangGraph that can be invoked
 
+    WHY LRU_CACHE:
+    Compile once, invoke many. The graph never changes between runs,
+    so every call after the first returns the same compiled object
+    instead of re-adding nodes/edges and recompiling.
+    (The LLM and chains in nodes.py are likewise built once, lazily:
+    the cached get_llm()/get_chains() factories create them on first use.)
+
     WORKFLOW:
     1. Generate initial answer with self-critique
+       (in parallel: prefetch a search for the raw question)
     2. Execute searches based on identified gaps
     3. Revise answer with search findings
     4. Check if we should continue (conditional)
        - If yes: repeat from step 2
-       - If no: return final answer
+       - If no (max iterations, or the critique found nothing missing):
+         return final answer
 
     VISUAL:
                  ┌──────────┐
                  │  START   │
                  └────┬─────┘
-                      │
-                      ▼
-              ┌───────────────┐
-              │   Generate    │ ← Creates initial answer + critique
-              └───────┬───────┘
-                      │ (always)
+                      │ (Send to both)
+            ┌─────────┴─────────┐
+            ▼                   ▼
+    ┌───────────────┐   ┌───────────────┐
+    │   Generate    │   │   Prefetch    │ ← Searches the raw question
+    └───────┬───────┘   └───────┬───────┘
+            │ (wait for both)   │
+            └─────────┬─────────┘
                       ▼
               ┌───────────────┐
-              │ Execute Tools │ ← Runs DuckDuckGo searches
+              │ Execute Tools │ ← Runs DuckDuckGo searches (concurrently)
               └───────┬───────┘
-                      │ (always)
+                      │ (if anything was searched)
                       ▼
               ┌───────────────┐
               │    Revise     │ ← Improves answer with findings
               └───────┬───────┘
+                (or: parallel revise_branch × N → merge_revisions)
                       │
                       ▼
                   ┌───────┐
@@ -88,17 +110,29 @@ def create_reflection_agent():
 
     WHY THIS FLOW:
     - Generate first: Get initial answer + identify gaps
+    - Prefetch alongside: the first search overlaps the first LLM call
     - Search: Fill those gaps with research
     - Revise: Create improved answer
     - Conditional: Decide if we need another round
+      (several queries? split them across parallel branches, then merge)
 
     The loop allows iterative improvement until satisfied or max iterations.
+
+    SINGLE-ROUND SPECIALIZATION (MAX_ITERATIONS <= 1):
+    After the first revision should_continue could only ever return END,
+    so the graph is built straight-line instead:
+        START → generate + prefetch → execute_tools → revise → END
+    No decision callback runs after "revise", and the branch/merge nodes
+    (unreachable then) are left out.
     """
 
+    # Known at build time: can the graph loop at all?
+    single_round = MAX_ITERATIONS <= 1
+
     # Create graph
-    # MessageGraph is designed for conversational workflows
-    # State is automatically a list of messages
-    graph = MessageGraph()
+    # StateGraph with AgentState: "messages" holds the conversation,
+    # other fields (like "prefetched") carry data between nodes
+    graph = StateGraph(AgentState)
 
     # ========================================================================
     # ADD NODES
@@ -115,12 +149,22 @@ def create_reflection_agent():
     graph.add_node("generate", generate_initial_response)
     # ^ When "generate" node runs, it calls generate_initial_response()
 
+    graph.add_node("prefetch", prefetch_search)
+    # ^ Speculative search of the raw question (runs alongside "generate")
+
     graph.add_node("execute_tools", execute_tools)
     # ^ When "execute_tools" node runs, it calls execute_tools()
 
     graph.add_node("revise", revise_answer)
     # ^ When "revise" node runs, it calls revise_answer()
 
+    if not single_round:
+        graph.add_node("revise_branch", revise_branch)
+        # ^ One parallel branch: searches a slice of the queries + revises
+
+        graph.add_node("merge_revisions", merge_revisions)
+        # ^ Combines the parallel branches' drafts into one answer
+
 
     # ========================================================================
     # ADD EDGES (Fixed)
@@ -131,11 +175,16 @@ def create_reflection_agent():
     These define deterministic flow.
     """
 
-    graph.add_edge("generate", "execute_tools")
-    # After generating initial answer, ALWAYS execute searches
+    graph.add_edge(["generate", "prefetch"], "execute_tools")
+    # Join: once the answer AND the prefetch are both done, execute searches
+    # (a list of sources means "wait for all of them")
 
-    graph.add_edge("execute_tools", "revise")
-    # After executing searches, ALWAYS revise the answer
+    if single_round:
+        graph.add_edge("revise", END)
+        # One round only: the first revision is always the final answer
+    else:
+        graph.add_edge("revise_branch", "merge_revisions")
+        # All branches run in the same step, so merge runs once after all finish
 
 
     # ========================================================================
@@ -147,6 +196,7 @@ def create_reflection_agent():
 
     should_continue() function determines the next step:
     - Returns "execute_tools" → Go back to searching (another iteration)
+    - Returns [Send("revise_branch", ...), ...] → Parallel branches
     - Returns END → Stop and return final result
 
     The second argument is a mapping:
@@ -158,14 +208,31 @@ def create_reflection_agent():
     Note: We could also go back to "revise" or any other node!
     """
 
-    graph.add_conditional_edges(
-        "revise",              # From this node...
-        should_continue,       # ...call this function to decide...
-        {
-            "execute_tools": "execute_tools",  # ...if it returns this, go here
-            END: END                           # ...if it returns END, finish
-        }
-    )
+    if not single_round:
+        graph.add_conditional_edges(
+            "revise",              # From this node...
+            should_continue,       # ...call this function to decide...
+            {
+                "execute_tools": "execute_tools",  # ...if it returns this, go here
+                "revise_branch": "revise_branch",  # ...(Send targets this node)
+                END: END                           # ...if it returns END, finish
+            }
+        )
+
+        # A merged round is just another revision: same decision afterwards
+        graph.add_conditional_edges(
+            "merge_revisions",
+            should_continue,
+            {
+                "execute_tools": "execute_tools",
+                "revise_branch": "revise_branch",
+                END: END
+            }
+        )
+
+    # After executing searches, revise the answer
+    # (END only if the first answer needed no research, so nothing was searched)
+    graph.add_conditional_edges("execute_tools", after_search, ["revise", END])
 
     # Alternative syntax (LangGraph handles the mapping automatically):
     # graph.add_conditional_edges("revise", should_continue)
@@ -179,11 +246,14 @@ def create_reflection_agent():
 
     """
     Where does the graph start?
-    When you invoke the graph, it begins at the entry point.
+    When you invoke the graph, it begins at START.
+
+    dispatch_start() returns two Send objects, so "generate" and
+    "prefetch" both run in the first step, in parallel.
     """
 
-    graph.set_entry_point("generate")
-    # Start at "generate" node
+    graph.add_conditional_edges(START, dispatch_start, ["generate", "prefetch"])
+    # Start at "generate" AND "prefetch"
 
 
     # ========================================================================
@@ -194,7 +264,11 @@ def create_reflection_agent():
     Compiling converts the graph definition into an executable workflow.
     The compiled graph can be invoked with:
         agent = create_reflection_agent()
-        result = agent.invoke([HumanMessage("Question here")])
+        result = await agent.ainvoke({"messages": [HumanMessage("Question here")]})
+        messages = result["messages"]
+
+    NOTE: the nodes are async (LLM calls and searches all share one
+    event loop), so use ainvoke (not invoke).
     """
 
     return graph.compile()
@@ -208,21 +282,24 @@ def create_reflection_agent():
 When you invoke the compiled graph:
 
     agent = create_reflection_agent()
-    result = agent.invoke([HumanMessage("What are benefits of IF?")])
+    result = await agent.ainvoke({"messages": [HumanMessage("What are benefits of IF?")]})
 
 Here's what happens:
 
-1. State starts as: [HumanMessage("What are benefits of IF?")]
+1. State starts as: {"messages": [HumanMessage("What are benefits of IF?")]}
 
-2. Execute "generate" node:
-   - Calls generate_initial_response([HumanMessage(...)])
-   - Returns AIMessage(tool_calls=[{answer, reflection, search_queries}])
-   - State becomes: [HumanMessage, AIMessage]
+2. Execute "generate" and "prefetch" nodes (in parallel):
+   - generate_initial_response() returns
+     AIMessage(tool_calls=[{answer, reflection, search_queries}])
+   - prefetch_search() searches the question text itself
+   - messages becomes: [HumanMessage, AIMessage]
+   - prefetched becomes: {"What are benefits of IF?": "...results..."}
 
-3. Follow edge to "execute_tools":
-   - Calls execute_tools([HumanMessage, AIMessage])
+3. Follow the join edge to "execute_tools":
+   - Calls execute_tools(state)
+   - Searches the refined queries, merges in the prefetched result
    - Returns [ToolMessage(search results)]
-   - State becomes: [HumanMessage, AIMessage, ToolMessage]
+   - messages becomes: [HumanMessage, AIMessage, ToolMessage]
 
 4. Follow edge to "revise":
    - Calls revise_answer([HumanMessage, AIMessage, ToolMessage])
@@ -231,12 +308,12 @@ Here's what happens:
 
 5. Execute conditional edge:
    - Calls should_continue([...all messages...])
-   - Returns "execute_tools" (if tool_count < MAX_ITERATIONS)
+   - Returns "execute_tools" (if state["iteration"] < MAX_ITERATIONS)
    - Goes back to step 3 and repeats
 
 6. Eventually should_continue returns END:
    - Graph execution stops
-   - Returns final state (all messages)
+   - Returns final state (result["messages"] has all messages)
 
 You can then extract the final answer from the last AIMessage!
 """
@@ -249,7 +326,7 @@ You can then extract the final answer from the last AIMessage!
 """
 Iteration 1:
   State: [HumanMessage]
-  → generate
+  → generate (+ prefetch in parallel)
   State: [HumanMessage, AIMessage(initial)]
   → execute_tools
   State: [HumanMessage, AIMessage(initial), ToolMessage]
@@ -12,9 +12,20 @@ HOW TO RUN:
     python main.py
 """
 
+import asyncio
+import logging
+from typing import List
+
 from langchain_core.messages import HumanMessage, AIMessage
 
+from config import BATCH_MAX_CONCURRENCY
 from graph import create_reflection_agent
+from nodes import warm_start
+
+
+# Errors are reported through logging so servers can route/silence them
+# (the CLI below configures it; importers keep their own setup)
+log = logging.getLogger(__name__)
 
 
 # ============================================================================
@@ -32,14 +43,28 @@ def extract_initial_answer(messages):
     Find and extract the initial answer from messages
 
     WHAT IT DOES:
-    Loops through messages to find the first AIMessage with an
-    "AnswerQuestion" tool call (the initial response).
+    Finds the first AIMessage with an "AnswerQuestion" tool call
+    (the initial response).
+
+    WHY CHECK INDEX 1 FIRST:
+    In a normal run the initial answer is always messages[1]
+    (right after the HumanMessage), so we can skip the scan.
+    The loop is only a fallback for unusual message lists.
+
+    PARAMETERS:
+    - messages: List of messages from the agent
 
     RETURNS:
     - Dictionary with answer, reflection, search_queries
     - None if not found
     """
 
+    if len(messages) > 1:
+        msg = messages[1]
+        if isinstance(msg, AIMessage) and msg.tool_calls:
+            if msg.tool_calls[0]["name"] == "AnswerQuestion":
+                return msg.tool_calls[0]["args"]
+
     for msg in messages:
         if isinstance(msg, AIMessage) and msg.tool_calls:
             if msg.tool_calls[0]["name"] == "AnswerQuestion":
@@ -59,18 +84,59 @@ def extract_final_answer(messages):
     The final answer is at the end of the message list.
     Searching backwards finds it immediately.
 
+    PARAMETERS:
+    - messages: List of messages from the agent
+
     RETURNS:
     - Dictionary with answer, reflection, search_queries, references
     - None if not found
     """
 
-    for msg in reversed(messages):
+    for i in range(len(messages) - 1, -1, -1):
+        msg = messages[i]
         if isinstance(msg, AIMessage) and msg.tool_calls:
             if msg.tool_calls[0]["name"] == "ReviseAnswer":
                 return msg.tool_calls[0]["args"]
     return None
 
 
+def extract_results(question, messages, iterations=0):
+    """
+    Build the structured result for one finished run
+
+    WHAT IT DOES:
+    Pulls the initial and final answers out of the message list.
+    Shared by arun_agent() and arun_agents().
+
+    WHY FALL BACK TO THE INITIAL ANSWER:
+    When the first answer needs no research (see MIN_REFLECTION_CHARS)
+    there is no ReviseAnswer. The initial answer IS the final one then,
+    so result["final_answer"]["answer"] always works; "revised" tells
+    the two cases apart.
+
+    PARAMETERS:
+    - question: The question that was asked
+    - messages: List of messages from the agent
+    - iterations: Completed search rounds (the final state's "iteration")
+
+    RETURNS:
+    - {"question", "initial_answer", "final_answer", "revised",
+       "message_count", "iterations"}
+    """
+
+    initial = extract_initial_answer(messages)
+    revised = extract_final_answer(messages)
+
+    return {
+        "question": question,
+        "initial_answer": initial,
+        "final_answer": revised if revised is not None else initial,
+        "revised": revised is not None,
+        "message_count": len(messages),
+        "iterations": iterations
+    }
+
+
 # ============================================================================
 # DISPLAY HELPERS
 # ============================================================================
@@ -129,9 +195,9 @@ def display_footer():
 # MAIN EXECUTION FUNCTION
 # ============================================================================
 
-def run_agent(question: str):
+async def arun_agent(question: str):
     """
-    Run the Reflection Agent on a question
+    Run the Reflection Agent on a question (async version)
 
     PARAMETERS:
     - question: str - The question to answer
@@ -141,6 +207,11 @@ def run_agent(question: str):
     2. Invokes it with the question
     3. Extracts and displays results
 
+    WHY ASYNC:
+    The search node runs its queries concurrently, so the graph
+    has to be driven with `await agent.ainvoke(...)`.
+    Use this directly if you already have an event loop (e.g. Jupyter).
+
     RETURNS:
     - Dictionary with initial and final answers
       (useful if you want to programmatically use results)
@@ -149,13 +220,13 @@ def run_agent(question: str):
     # Display header
     display_header(question)
 
-    # Create the agent
-    # This builds the LangGraph workflow
+    # Get the agent
+    # Built on the first call, then reused (create_reflection_agent is cached)
     agent = create_reflection_agent()
 
-    # Prepare initial message
+    # Prepare initial state
     # Wrap user's question in HumanMessage
-    initial_messages = [HumanMessage(content=question)]
+    initial_state = {"messages": [HumanMessage(content=question)]}
 
     try:
         # ====================================================================
@@ -165,7 +236,7 @@ def run_agent(question: str):
         """
         This is where the magic happens!
 
-        agent.invoke() runs the entire workflow:
+        agent.ainvoke() runs the entire workflow:
         1. Generate initial answer
         2. Search for missing info
         3. Revise with findings
@@ -175,7 +246,8 @@ def run_agent(question: str):
         result_messages is a list of all messages (state history)
         """
 
-        result_messages = agent.invoke(initial_messages)
+        result = await agent.ainvoke(initial_state)
+        result_messages = result["messages"]
 
 
         # ====================================================================
@@ -188,8 +260,9 @@ def run_agent(question: str):
         - Final answer (last ReviseAnswer tool call)
         """
 
-        initial = extract_initial_answer(result_messages)
-        final = extract_final_answer(result_messages)
+        results = extract_results(question, result_messages, result.get("iteration", 0))
+        initial = results["initial_answer"]
+        final = results["final_answer"]
 
 
         # ====================================================================
@@ -205,10 +278,10 @@ def run_agent(question: str):
         if initial:
             display_initial_answer(initial)
 
-        if final:
+        if results["revised"]:
             display_final_answer(final)
         elif initial:
-            # If no final (shouldn't happen), show initial as final
+            # No revision when the first answer needed no research (see MIN_REFLECTION_CHARS)
             print("\n⚠️  No revision occurred (using initial answer)")
 
         display_footer()
@@ -223,12 +296,7 @@ def run_agent(question: str):
         (in case you want to save to database, use in API, etc.)
         """
 
-        return {
-            "question": question,
-            "initial_answer": initial,
-            "final_answer": final,
-            "message_count": len(result_messages)
-        }
+        return results
 
 
     except Exception as e:
@@ -236,11 +304,10 @@ def run_agent(question: str):
         # ERROR HANDLING
         # ====================================================================
 
-        print(f"\n❌ Error: {e}")
-
-        # Print full traceback for debugging
-        import traceback
-        traceback.print_exc()
+        # One line at ERROR; the full traceback only when DEBUG is on
+        # WHY: formatting a traceback walks every frame - skip it unless asked
+        log.error("❌ Agent failed: %s", e)
+        log.debug("Agent traceback", exc_info=True)
 
         return {
             "question": question,
@@ -248,6 +315,78 @@ def run_agent(question: str):
         }
 
 
+def run_agent(question: str):
+    """
+    Run the Reflection Agent on a question
+
+    Synchronous wrapper around arun_agent() for scripts and the CLI.
+
+    RETURNS:
+    - Same dictionary as arun_agent()
+    """
+
+    return asyncio.run(arun_agent(question))
+
+
+# ============================================================================
+# BATCH EXECUTION
+# ============================================================================
+
+async def arun_agents(questions: List[str]):
+    """
+    Run the Reflection Agent on many questions at once (async version)
+
+    PARAMETERS:
+    - questions: List[str] - The questions to answer
+
+    WHAT IT DOES:
+    Hands every question to ONE agent.abatch() call.
+    Up to BATCH_MAX_CONCURRENCY runs are in flight at the same time,
+    so one question's LLM call overlaps another's searches.
+
+    WHY NOT A LOOP OF arun_agent():
+    - Each run spends most of its time waiting on the network
+    - Overlapping runs keeps the connection pools warm and spreads
+      requests evenly over Gemini's per-minute quota
+    - max_concurrency stops a big batch from tripping rate limits
+
+    NOTE:
+    Nothing is displayed (use this for evals / servers).
+    A failed run doesn't stop the batch; it gets an "error" entry instead.
+
+    RETURNS:
+    - List of result dictionaries, in the same order as questions
+    """
+
+    agent = create_reflection_agent()
+
+    inputs = [{"messages": [HumanMessage(content=q)]} for q in questions]
+    outputs = await agent.abatch(
+        inputs,
+        config={"max_concurrency": BATCH_MAX_CONCURRENCY},
+        return_exceptions=True,
+    )
+
+    return [
+        {"question": q, "error": str(out)} if isinstance(out, Exception)
+        else extract_results(q, out["messages"], out.get("iteration", 0))
+        for q, out in zip(questions, outputs)
+    ]
+
+
+def run_agents(questions: List[str]):
+    """
+    Run the Reflection Agent on many questions at once
+
+    Synchronous wrapper around arun_agents() for scripts.
+
+    RETURNS:
+    - Same list as arun_agents()
+    """
+
+    return asyncio.run(arun_agents(questions))
+
+
 # ============================================================================
 # COMMAND LINE INTERFACE
 # ============================================================================
@@ -257,6 +396,23 @@ This runs when you execute the file directly:
     python reflection_agent/main.py
 """
 
+async def _ask_and_run():
+    """
+    Prompt for a question and answer it, all on ONE event loop
+
+    WHY ONE LOOP:
+    warm_start() primes the async LLM connection while the user types.
+    That connection belongs to the loop that opened it, so the graph has
+    to run on the same loop to reuse it (input() runs in a thread so the
+    ping can proceed meanwhile).
+    """
+
+    # Keep a reference so the task isn't garbage-collected mid-ping
+    warm = asyncio.create_task(warm_start())
+    question = await asyncio.to_thread(input, "What would you like to research? ")
+    return await arun_agent(question)
+
+
 if __name__ == "__main__":
 
     # ========================================================================
@@ -273,14 +429,17 @@ if __name__ == "__main__":
     - "What are the best practices for React performance optimization?"
     """
 
-    question = input("What would you like to research? ")
-
+    # Plain messages, INFO and up (set level=logging.DEBUG for full tracebacks).
+    # The node progress lines are DEBUG on the "nodes" logger - config.VERBOSE
+    # turns them on, so they show up here just like the old prints
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
 
     # ========================================================================
     # RUN THE AGENT
     # ========================================================================
 
-    result = run_agent(question)
+    # Warms up the LLM connection while the user types, then runs the agent
+    result = asyncio.run(_ask_and_run())
 
 
     # ========================================================================
@@ -315,7 +474,8 @@ Or customize the display:
     from langchain_core.messages import HumanMessage
 
     agent = create_reflection_agent()
-    messages = agent.invoke([HumanMessage("Question")])
+    result = await agent.ainvoke({"messages": [HumanMessage("Question")]})
+    messages = result["messages"]
 
     # Process messages however you want
     ...
@@ -18,19 +18,69 @@ Each worker has a specific job:
 - Worker 1: Draft the answer
 - Worker 2: Do research
 - Worker 3: Improve the draft
+
+RULE - KEEP LLM INPUTS DETERMINISTIC:
+Providers cache repeated request prefixes (see prompts.py). Anything we
+render into a prompt must come out byte-identical for identical data:
+- Serialize with _serialize() (sorted keys, fixed separators)
+- Never inject timestamps, random ids or counters into message content
 """
 
+import asyncio
 import json
-from typing import List
-from langchain_core.messages import AIMessage, ToolMessage, BaseMessage
+import logging
+import re
+import threading
+import time
+from functools import lru_cache
+from urllib.parse import urlsplit
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+try:
+    import orjson
+except ImportError:  # Optional speedup: _serialize falls back to stdlib json
+    orjson = None
+from langchain_core.messages import (
+    AIMessage,
+    HumanMessage,
+    ToolMessage,
+    BaseMessage,
+    message_chunk_to_message,
+)
+from langchain_core.runnables import Runnable
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from langchain_google_genai import ChatGoogleGenerativeAI
-
-from config import MODEL_NAME, TEMPERATURE, VERBOSE, SEARCH_RESULT_LIMIT
+from langgraph.graph import END
+from langgraph.types import Send
+
+from config import (
+    MODEL_NAME,
+    TEMPERATURE,
+    VERBOSE,
+    SEARCH_RESULT_TOKEN_LIMIT,
+    SEARCH_RESULT_TOKENIZER,
+    MAX_ITERATIONS,
+    MAX_PARALLEL_REQUESTS,
+    MIN_REFLECTION_CHARS,
+    SEMANTIC_CACHE_ENABLED,
+    REFERENCE_DEDUPE_THRESHOLD,
+    PARALLEL_REVISION_BRANCHES,
+)
+from cache import search_cache
 from models import AnswerQuestion, ReviseAnswer
-from prompts import initial_prompt, revision_prompt
+from prompts import initial_prompt, revision_prompt, merge_prompt
+from state import AgentState
 from tools import search_tool
 
 
+# Progress messages go through logging (lazy %-formatting, configurable
+# handlers) instead of print. VERBOSE turns the DEBUG-level progress on;
+# warnings (e.g. failed searches) are always logged.
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG if VERBOSE else logging.INFO)
+
+
 # ============================================================================
 # LLM INITIALIZATION
 # ============================================================================
@@ -42,14 +92,25 @@ WHY GOOGLE GEMINI:
 - Fast and high quality
 - Works reliably with complex Pydantic models
 
-The LLM is initialized once and reused across nodes.
+The LLM is created once per model name (on first use) and reused across nodes.
 """
 
-llm = ChatGoogleGenerativeAI(
-    model=MODEL_NAME,
-    temperature=TEMPERATURE,
-    convert_system_message_to_human=True,  # Required for some models
-)
+@lru_cache(maxsize=None)
+def get_llm(model_name: str = MODEL_NAME) -> ChatGoogleGenerativeAI:
+    """
+    The shared chat model for `model_name`, created on first use
+
+    WHY LAZY:
+    Importing nodes.py (e.g. to build the graph or run tests) no longer
+    creates an API client. The first call builds it; later calls get the
+    same object back from the cache.
+    """
+
+    return ChatGoogleGenerativeAI(
+        model=model_name,
+        temperature=TEMPERATURE,
+        convert_system_message_to_human=True,  # Required for some models
+    )
 
 
 # ============================================================================
@@ -61,7 +122,7 @@ WHAT IS A CHAIN:
 A chain is: Prompt Template | LLM | Tool Binding
 
 It means:
-1. Format the prompt with conversation history
+1. Format the prompt with the question / draft / evidence
 2. Send to LLM
 3. LLM returns structured output (tool call)
 
@@ -69,43 +130,228 @@ WHY BIND_TOOLS:
 - Tells LLM "you must return data matching this Pydantic model"
 - tool_choice="AnswerQuestion" FORCES the LLM to use that tool
 - No manual JSON parsing needed!
+
+WHY CONVERT SCHEMAS UP FRONT:
+Turning a Pydantic model into a JSON tool schema isn't free.
+Doing it once here (at import) means no request ever pays for it.
+
+WHY ONE BOUND LLM:
+ReviseAnswer extends AnswerQuestion, so both tools are bound ONCE.
+Each chain only adds its own tool_choice on top (a cheap .bind),
+instead of a separate bind_tools call per chain.
+
+WHY A CACHED FACTORY:
+get_chains() builds the three chains once per model name and then
+returns the same objects. With worker processes (ProcessPoolExecutor,
+joblib), call get_chains() in the parent BEFORE forking so every worker
+inherits the built chains instead of rebuilding them.
 """
 
-# Initial chain: Generates first answer with self-critique
-initial_chain = initial_prompt | llm.bind_tools(
-    tools=[AnswerQuestion],
-    tool_choice="AnswerQuestion"  # Must use this tool
-)
+# Tool schemas, converted once from the Pydantic models
+ANSWER_TOOL = convert_to_openai_tool(AnswerQuestion)
+REVISE_TOOL = convert_to_openai_tool(ReviseAnswer)
 
-# Revision chain: Generates improved answer with references
-revisor_chain = revision_prompt | llm.bind_tools(
-    tools=[ReviseAnswer],
-    tool_choice="ReviseAnswer"  # Must use this tool
-)
+
+class Chains(NamedTuple):
+    """The three LLM chains the nodes use"""
+    initial: Runnable   # First answer with self-critique
+    revisor: Runnable   # Improved answer with references
+    merge: Runnable     # Combines parallel revision drafts into one answer
+
+
+@lru_cache(maxsize=None)
+def get_chains(model_name: str = MODEL_NAME) -> Chains:
+    """Build (once per model) the prompt | LLM chains used by the nodes"""
+
+    # One LLM bound to both tools, shared by every chain
+    bound_llm = get_llm(model_name).bind_tools(tools=[ANSWER_TOOL, REVISE_TOOL])
+
+    return Chains(
+        initial=initial_prompt | bound_llm.bind(
+            tool_choice="AnswerQuestion"  # Must use this tool
+        ),
+        revisor=revision_prompt | bound_llm.bind(
+            tool_choice="ReviseAnswer"  # Must use this tool
+        ),
+        merge=merge_prompt | bound_llm.bind(
+            tool_choice="ReviseAnswer"  # Same output shape as a normal revision
+        ),
+    )
+
+
+# ============================================================================
+# WARM START
+# ============================================================================
+
+async def warm_start() -> None:
+    """
+    Prime the Gemini connection before the first real request
+
+    WHAT IT DOES:
+    Builds the chains (get_chains) and sends a tiny 1-token "ping"
+    through the shared LLM client's ASYNC transport. Also loads the
+    snippet tokenizer (a one-off download) in a worker thread.
+
+    WHY:
+    The first request pays one-off costs: TLS handshake with the API
+    and auth setup. Paying them here (e.g. while the user is typing)
+    means the first real question sees steady-state latency.
+
+    WHY ASYNC (and on the graph's loop):
+    The nodes only use astream/ainvoke, which go through a separate
+    async client from invoke(). Its connections belong to the event loop
+    that opened them, so await this on the SAME loop that runs the graph
+    (see main.py's CLI) or the primed connection is never reused.
+
+    Failures are ignored - the real request will simply pay the cost.
+    """
+
+    try:
+        get_chains()
+        await get_llm().ainvoke("ping", max_output_tokens=1)
+    except Exception as e:
+        log.debug("⚠ Warm start skipped: %s", e)
+
+    await asyncio.to_thread(_token_encoder)  # Never raises
+
+
+# ============================================================================
+# PROGRESS LOGGING
+# ============================================================================
+
+def _log_tool_call(response: AIMessage, action: str) -> None:
+    """
+    Log a one-glance summary of an answer/revision tool call
+
+    WHY ONE HELPER:
+    Reads response.tool_calls and its args ONCE (the property is
+    rebuilt on access in some LangChain versions) and keeps the
+    generate/revise/merge progress lines consistent.
+    """
+
+    if not log.isEnabledFor(logging.DEBUG):
+        return
+
+    tool_calls = response.tool_calls
+    if not tool_calls:
+        return
+
+    args = tool_calls[0]["args"]
+    reflection = args.get("reflection") or {}
+    queries = args.get("search_queries") or []
+    references = args.get("references") or []
+
+    log.debug("   ✓ Answer %s (%d chars)", action, len(args.get("answer", "")))
+    if reflection.get("missing"):
+        log.debug("   ✓ Self-critique: %s...", reflection["missing"][:80])
+    if queries:
+        log.debug("   ✓ Search queries: %d queries", len(queries))
+    if references:
+        log.debug("   ✓ References: %d", len(references))
+
+
+# ============================================================================
+# STREAMING: EARLY SEARCH DISPATCH
+# ============================================================================
+
+"""
+WHY STREAM:
+The LLM writes its tool call as JSON, token by token. "search_queries"
+is a short list, and each query is complete long before the whole
+response is. By watching the stream we can START each search the moment
+its query string closes, so searching overlaps the rest of generation.
+
+HOW:
+- Concatenate the tool-call argument fragments as they arrive
+- Find the "search_queries": [ ... part of the (partial) JSON
+- Decode the complete string elements with json's raw_decode;
+  a half-written string fails to decode, so we just wait for more
+
+ONLY WHEN THE CRITIQUE FOUND GAPS:
+Searches can't be called back once they're on the wire, so nothing
+starts until the "reflection" object is complete AND says something is
+missing (the same test execute_tools applies). Args arrive in key
+order, so the reflection is written before the queries.
+"""
+
+_QUERIES_FIELD = re.compile(r'"search_queries"\s*:\s*\[')
+_REFLECTION_FIELD = re.compile(r'"reflection"\s*:\s*')
+_json_decoder = json.JSONDecoder()
+
+
+def _completed_reflection(args_buffer: str) -> Optional[Dict[str, Any]]:
+    """
+    Return the "reflection" object once it's fully written, else None
+
+    EXAMPLE:
+    '{"answer": "...", "reflection": {"missing": "RCTs", "superfluous": ""}, "se'
+    -> {"missing": "RCTs", "superfluous": ""}
+    """
+
+    match = _REFLECTION_FIELD.search(args_buffer)
+    if not match:
+        return None
+    try:
+        reflection, _ = _json_decoder.raw_decode(args_buffer, match.end())
+    except ValueError:
+        return None  # Still being written
+    return reflection if isinstance(reflection, dict) else None
+
+
+def _completed_queries(args_buffer: str) -> List[str]:
+    """
+    Return every search query fully written so far in a partial JSON buffer
+
+    EXAMPLE:
+    '{"answer": "...", "search_queries": ["IF RCT 2023", "IF saf'
+    -> ["IF RCT 2023"]
+    """
+
+    match = _QUERIES_FIELD.search(args_buffer)
+    if not match:
+        return []
+
+    queries = []
+    pos = match.end()
+    while True:
+        # Skip whitespace and commas between elements
+        while pos < len(args_buffer) and args_buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(args_buffer) or args_buffer[pos] == "]":
+            break
+        try:
+            query, pos = _json_decoder.raw_decode(args_buffer, pos)
+        except ValueError:
+            break  # Element still being written
+        if isinstance(query, str):
+            queries.append(query)
+    return queries
 
 
 # ============================================================================
 # NODE 1: GENERATE INITIAL RESPONSE
 # ============================================================================
 
-def generate_initial_response(messages: List[BaseMessage]) -> AIMessage:
+async def generate_initial_response(state: AgentState) -> Dict[str, Any]:
     """
     Generate initial answer with self-critique and search queries
 
     WHAT IT DOES:
-    1. Receives user's question (in messages)
-    2. Calls LLM with initial_chain
+    1. Receives user's question (in state["messages"])
+    2. Calls LLM with get_chains().initial
     3. LLM returns:
        - answer (based on existing knowledge)
        - reflection (self-critique: what's missing/superfluous)
        - search_queries (to find missing info)
 
     PARAMETERS:
-    - messages: List[BaseMessage] - Conversation so far
+    - state: AgentState - state["messages"] is the conversation so far
       Usually just [HumanMessage("What are benefits of IF?")]
 
     RETURNS:
-    - AIMessage with tool_calls containing the structured response
+    - {"messages": [AIMessage], "pending_searches": {key: Task}}
+      tool_calls contain the structured response; pending_searches are
+      the searches already started while the response was streaming
 
     WHY THIS STRUCTURE:
     The LLM doesn't just answer - it REFLECTS on its answer.
@@ -130,45 +376,440 @@ def generate_initial_response(messages: List[BaseMessage]) -> AIMessage:
     )
     """
 
-    if VERBOSE:
-        print("\n🤖 Generating initial response with self-critique...")
+    log.debug("\n🤖 Generating initial response with self-critique...")
 
-    # Invoke the chain
-    # The prompt template inserts messages into MessagesPlaceholder
+    # Stream the chain
+    # The prompt template only needs the question text
     # LLM is bound to AnswerQuestion tool
-    # Result has structured tool_call automatically
-    response = initial_chain.invoke({"messages": messages})
+    # Chunks add up to the full message with a structured tool_call
+    pending = {}
+    args_buffer = ""
+    response = None
+    has_gaps = None  # Unknown until the reflection is fully streamed
+
+    question = _last_question(state["messages"])
+    question_key = _query_key(question)  # prefetch_search covers this one
+    async for chunk in get_chains().initial.astream({"question": question}):
+        response = chunk if response is None else response + chunk
+
+        for tool_call_chunk in getattr(chunk, "tool_call_chunks", []):
+            args_buffer += tool_call_chunk.get("args") or ""
+
+        if has_gaps is None:
+            reflection = _completed_reflection(args_buffer)
+            if reflection is not None:
+                has_gaps = _critique_has_gaps(reflection)
+        if not has_gaps:
+            continue
+
+        # Start each query's search as soon as it's fully written
+        for query in _completed_queries(args_buffer):
+            key = _query_key(query)
+            if key not in pending and key != question_key:
+                log.debug("   ⚡ Early search: %s", query)
+                pending[key] = asyncio.create_task(
+                    _search(len(pending) + 1, query)
+                )
+
+    response = message_chunk_to_message(response)
 
     # Display info if verbose
-    if VERBOSE and response.tool_calls:
-        args = response.tool_calls[0]['args']
-        print(f"   ✓ Answer generated ({len(args['answer'])} chars)")
-        print(f"   ✓ Self-critique: {args['reflection']['missing'][:80]}...")
-        print(f"   ✓ Search queries: {len(args['search_queries'])} queries")
+    _log_tool_call(response, "generated")
 
-    return response
+    return {"messages": [response], "pending_searches": pending}
+
+
+def generate_initial_response_batch(
+    message_lists: Sequence[Sequence[BaseMessage]],
+) -> List[AIMessage]:
+    """
+    Generate initial answers for many independent conversations at once
+
+    WHAT IT DOES:
+    Same LLM call as generate_initial_response, but for N conversations
+    in one get_chains().initial.batch() (up to MAX_PARALLEL_REQUESTS in flight).
+    No streaming and no early searches - meant for eval sweeps and
+    dataset generation, NOT used by the graph.
+
+    EXAMPLE:
+    generate_initial_response_batch([[HumanMessage("Q1")], [HumanMessage("Q2")]])
+    -> [AIMessage(AnswerQuestion for Q1), AIMessage(AnswerQuestion for Q2)]
+    """
+
+    return get_chains().initial.batch(
+        [{"question": _last_question(messages)} for messages in message_lists],
+        config={"max_concurrency": MAX_PARALLEL_REQUESTS},
+    )
+
+
+# ============================================================================
+# NODE 1b: SPECULATIVE SEARCH PREFETCH
+# ============================================================================
+
+def _last_question(messages: Sequence[BaseMessage]) -> str:
+    """Return the text of the most recent HumanMessage"""
+    for msg in reversed(messages):
+        if isinstance(msg, HumanMessage):
+            return msg.content
+    return ""
+
+
+async def prefetch_search(state: AgentState) -> Dict[str, Dict[str, Any]]:
+    """
+    Search for the raw user question while the LLM drafts its answer
+
+    WHAT IT DOES:
+    Runs in PARALLEL with generate_initial_response (both are dispatched
+    from START). It searches the user's question verbatim and parks the
+    result in state["prefetched"] for execute_tools to pick up.
+
+    WHY:
+    The first LLM call and this search don't depend on each other.
+    Overlapping them hides one search round-trip behind the LLM call.
+
+    RETURNS:
+    - {"prefetched": {question: result}, "searched": {key: result}}
+    """
+
+    question = _last_question(state["messages"])
+    if not question:
+        return {"prefetched": {}}
+
+    log.debug("\n⚡ Prefetching search for the question...")
+
+    result = await _search(0, question)
+
+    return {"prefetched": {question: result}, "searched": _remember({question: result})}
 
 
 # ============================================================================
 # NODE 2: EXECUTE SEARCH TOOLS
 # ============================================================================
 
-def execute_tools(state: List[BaseMessage]) -> List[ToolMessage]:
+# One query's result: list of hits, or an error note if the search failed
+SearchResult = Union[List[Dict[str, str]], str]
+
+# Words that don't change what a query is about
+# (question words like how/why/what DO: "how does X affect Y" and
+# "why does X affect Y" need different results, so they are kept)
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from",
+    "in", "is", "it", "of", "on", "or", "that", "the", "to", "with",
+})
+
+
+def _query_key(query: str) -> str:
+    """
+    Normalize a query for duplicate detection
+
+    "What are the Benefits of IF?" -> "what benefits if"
+    (lowercase, punctuation -> spaces, stopwords dropped)
+    """
+    words = re.sub(r"\W+", " ", query.lower()).split()
+    key = " ".join(word for word in words if word not in _STOPWORDS)
+    return key or " ".join(words)  # All stopwords? Keep them rather than ""
+
+
+def _remember(query_results: Dict[str, SearchResult]) -> Dict[str, SearchResult]:
+    """
+    Build a state["searched"] update from fresh results
+
+    Failed searches (error strings) are NOT remembered,
+    so a later round gets a chance to retry them.
+    """
+    return {
+        _query_key(query): result
+        for query, result in query_results.items()
+        if not isinstance(result, str)
+    }
+
+
+def _serialize(query_results: Any) -> str:
+    """
+    Turn {query: hits} (or any JSON-able value) into the JSON text sent to the LLM
+
+    WHY ORJSON:
+    - Compact by default: no whitespace between items
+    - Always UTF-8: unicode stays as-is instead of \\uXXXX escapes
+    Both are pure token savings - the LLM parses it the same way.
+    And it encodes several times faster than the stdlib json module.
+
+    WHY SORT KEYS:
+    The same data must always give the same bytes, whatever order the
+    LLM happened to emit its args in - so prompt prefixes stay cacheable.
+
+    Without orjson installed, stdlib json produces the same text
+    (compact separators, no \\u escapes, sorted keys), just slower.
     """
-    Execute search queries using DuckDuckGo
+    if orjson is not None:
+        return orjson.dumps(query_results, option=orjson.OPT_SORT_KEYS).decode()
+    return json.dumps(query_results, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+
+# Loaded tiktoken encoding (None until a load succeeds)
+_tokenizer = None
+_tokenizer_failed_at = float("-inf")
+_tokenizer_lock = threading.Lock()
+
+# After a failed load, wait this long before trying again
+_TOKENIZER_RETRY_SECONDS = 300
+
+
+def _token_encoder():
+    """
+    The tiktoken encoding used for snippet truncation (loaded once)
+
+    WHY LAZY + FALLBACK:
+    tiktoken downloads its vocabulary file the first time an encoding is
+    used. Loading it lazily keeps imports fast, and returning None
+    offline lets truncation fall back to characters.
+
+    BLOCKING:
+    The first call may hit the network - only call it from a worker
+    thread (warm_start() and _search() do) or outside the event loop.
+
+    WHY NOT lru_cache:
+    A failure is NOT kept forever: after _TOKENIZER_RETRY_SECONDS the
+    next call tries again, so one network blip doesn't leave the whole
+    process on the character heuristic.
+    """
+
+    global _tokenizer, _tokenizer_failed_at
+
+    if _tokenizer is not None:
+        return _tokenizer
+    with _tokenizer_lock:
+        if _tokenizer is None and time.monotonic() - _tokenizer_failed_at >= _TOKENIZER_RETRY_SECONDS:
+            try:
+                import tiktoken
+                _tokenizer = tiktoken.get_encoding(SEARCH_RESULT_TOKENIZER)
+            except Exception as e:
+                _tokenizer_failed_at = time.monotonic()
+                log.debug("⚠ Tokenizer unavailable (%s); counting ~4 chars per token", e)
+    return _tokenizer
+
+
+def _truncate_tokens(text: str, limit: int) -> str:
+    """
+    Cut text down to at most `limit` tokens
+
+    EXAMPLE (limit=3):
+    "Intermittent fasting improves insulin" -> "Intermittent fasting"
+    (the exact cut depends on the tokenizer)
+
+    Without a tokenizer: ~4 characters per token.
+    """
+
+    encoder = _token_encoder()
+    if encoder is None:
+        return text[:limit * 4]
+
+    tokens = encoder.encode(text)
+    if len(tokens) <= limit:
+        return text
+    return encoder.decode(tokens[:limit])
+
+
+def _count_tokens(text: str) -> int:
+    """Tokens in text (~4 characters per token without a tokenizer)"""
+    encoder = _token_encoder()
+    if encoder is None:
+        return -(-len(text) // 4)
+    return len(encoder.encode(text))
+
+
+def _fit_hits(hits: List[Dict[str, str]], limit: int) -> List[Dict[str, str]]:
+    """
+    Trim one query's hits so together they fit in `limit` tokens
+
+    HOW:
+    Titles and URLs are kept whole (the revisor cites them), and their
+    tokens come out of the budget first. What's left is split evenly
+    between the hit bodies.
+
+    EXAMPLE (limit=200, 3 hits with ~20 tokens of title + URL each):
+    -> each body is cut to (200 - 60) // 3 = 46 tokens
+    """
+
+    if not hits:
+        return hits
+
+    overhead = sum(
+        _count_tokens(hit.get("title", "")) + _count_tokens(hit.get("href", ""))
+        for hit in hits
+    )
+    per_hit = max(limit - overhead, 0) // len(hits)
+    for hit in hits:
+        hit["body"] = _truncate_tokens(hit["body"], per_hit)
+    return hits
+
+
+async def _search(index: int, query: str) -> SearchResult:
+    """
+    Run one search query (cache first, then DuckDuckGo)
+
+    CONCURRENCY LIMIT:
+    All queries are fired at once, but DuckDuckGo rate-limits bursts.
+    tools.py caps how many are actually on the wire at a time, across
+    every node and every concurrent run (MAX_CONCURRENT_SEARCHES).
+
+    WHY CHECK THE CACHE FIRST:
+    A semantically similar query may already have been searched
+    (earlier iteration or earlier run). A hit skips the network entirely.
+    The cache is only an optimization: if it fails (e.g. the embedding
+    model can't load) the query is simply searched live.
+
+    RETURNS:
+    - List of hits (bodies trimmed to share SEARCH_RESULT_TOKEN_LIMIT),
+      or an error note if the search failed
+    """
+
+    if SEMANTIC_CACHE_ENABLED:
+        cached = await _cache_call(search_cache.get, query)
+        if cached is not None:
+            log.debug("   [%d] Cache hit: %s", index, query)
+            return cached
+
+    try:
+        log.debug("   [%d] Searching: %s", index, query)
+
+        # Actually run the search! (non-blocking)
+        result = await search_tool.ainvoke(query)
+
+        # Limit the query's snippets to avoid token overload
+        # (one budget shared by all hits; trimmed before serializing).
+        # In a thread: tokenizing (and the first tokenizer load) is
+        # blocking work that would stall the stream and other searches
+        result = await asyncio.to_thread(_fit_hits, result, SEARCH_RESULT_TOKEN_LIMIT)
+
+    except Exception as e:
+        log.warning("   ⚠ Search error: %s", e)
+        if SEMANTIC_CACHE_ENABLED:
+            # No put() will follow: drop the vector the miss kept for it
+            await _cache_call(search_cache.discard, query)
+        return f"Search unavailable: {str(e)}"
+
+    # Only successful searches are cached (errors returned above)
+    if SEMANTIC_CACHE_ENABLED:
+        await _cache_call(search_cache.put, query, result)
+    return result
+
+
+async def _cache_call(method, *args) -> Any:
+    """
+    Run a search_cache method in a worker thread; None if it fails
+
+    WHY A THREAD: loading the embedding model and encoding are CPU work
+    that would otherwise stall every other search and the streaming LLM.
+    WHY SWALLOW ERRORS: a broken cache must never break a search.
+    """
+
+    try:
+        return await asyncio.to_thread(method, *args)
+    except Exception as e:
+        log.warning("   ⚠ Search cache unavailable: %s", e)
+        return None
+
+
+async def _search_all(
+    queries: List[str],
+    searched: Dict[str, SearchResult],
+    pending: Optional[Dict[str, "asyncio.Task[SearchResult]"]] = None,
+) -> Dict[str, SearchResult]:
+    """
+    Run several queries concurrently, skipping ones already searched this run
+
+    WHY SKIP:
+    Later rounds often re-ask (almost) the same query as an earlier round.
+    If its normalized form is in state["searched"], the earlier result is
+    reused instead of paying for another network round-trip.
+
+    WHY PENDING:
+    Searches started early (while the LLM was still streaming) are
+    awaited instead of started again. Used tasks are popped from `pending`.
+
+    WHY DEDUPE:
+    The LLM sometimes repeats a query within one round ("IF safety" and
+    "if  safety"). Each normalized query is searched once and its result
+    is handed to every spelling of it.
+
+    RETURNS:
+    - {query: result} in the same order as the queries
+      (gather() preserves order)
+    """
+
+    # One representative query per normalized key, first spelling wins
+    unique = {}
+    for query in queries:
+        unique.setdefault(_query_key(query), query)
+
+    fresh = [query for key, query in unique.items() if key not in searched]
+    if len(fresh) < len(queries):
+        log.debug("   ↺ Reusing %d earlier/duplicate results", len(queries) - len(fresh))
+
+    pending = pending if pending is not None else {}
+
+    async def search_or_join(i: int, query: str) -> SearchResult:
+        task = pending.pop(_query_key(query), None)
+        if task is not None:
+            return await task
+        return await _search(i, query)
+
+    results = await asyncio.gather(*[
+        search_or_join(i, query)
+        for i, query in enumerate(fresh, 1)
+    ])
+    by_key = {**searched, **{_query_key(query): result for query, result in zip(fresh, results)}}
+
+    # Fan each result back out to every original spelling
+    return {query: by_key[_query_key(query)] for query in queries}
+
+
+# Tool calls whose args carry search_queries for execute_tools to run
+_SEARCH_TOOLS = frozenset({"AnswerQuestion", "ReviseAnswer"})
+
+
+def _search_queries(tool_call: Dict[str, Any]) -> List[str]:
+    """Queries a search tool call asks for"""
+    return tool_call["args"].get("search_queries", [])
+
+
+# Tool name -> handler returning the queries to search for that call.
+# WHY A DICT: a new tool plugs in here without touching execute_tools;
+# calls to tools without a handler are ignored
+_HANDLERS = dict.fromkeys(_SEARCH_TOOLS, _search_queries)
+
+
+async def execute_tools(state: AgentState) -> Dict[str, object]:
+    """
+    Execute search queries using DuckDuckGo (concurrently)
 
     WHAT IT DOES:
     1. Gets last AI message from state
     2. Extracts search_queries from its tool_call
-    3. Runs each query through DuckDuckGo
-    4. Returns results as ToolMessages
+    3. Skips queries already answered by the prefetch search
+    4. Reuses results for queries already searched in an earlier round
+    5. Runs the rest through DuckDuckGo at the same time
+    6. Returns results (prefetched + new) as ToolMessages
 
     PARAMETERS:
-    - state: List[BaseMessage] - Full conversation history
+    - state: AgentState - Full conversation history in state["messages"]
       At this point contains: [HumanMessage, AIMessage with tool_call]
+      On the first round, state["prefetched"] holds the prefetch result
 
     RETURNS:
-    - List[ToolMessage] - Search results for each query
+    - {"messages": List[ToolMessage], "prefetched": {}, "searched": {...},
+       "pending_searches": {}, "iteration": n + 1}
+      (prefetched and pending_searches are cleared once consumed;
+       searched records this round's results for later rounds;
+       iteration counts completed search rounds for should_continue)
+
+    WHY ASYNC:
+    Searching is pure network waiting. Running the queries one after
+    another takes sum(latencies); firing them together with
+    asyncio.gather takes roughly max(latency). The queries of ALL tool
+    calls go out in one batch, so multiple calls don't queue up either.
+    This is also why the graph must be run with `await agent.ainvoke(...)`.
 
     WHY TOOLMESSAGE:
     ToolMessage tells the LLM: "Here are the results from the tool you called"
@@ -176,7 +817,7 @@ def execute_tools(state: List[BaseMessage]) -> List[ToolMessage]:
 
     FLOW:
     1. Extract: Get search_queries from AI's tool_call
-    2. Search: Run each query through DuckDuckGo
+    2. Search: Run all queries through DuckDuckGo concurrently
     3. Package: Wrap results in ToolMessage
     4. Return: These get added to conversation state
 
@@ -187,86 +828,267 @@ def execute_tools(state: List[BaseMessage]) -> List[ToolMessage]:
     }])]
 
     Output: [ToolMessage(
-        content='{"IF RCT 2023": "...results...", "IF safety": "...results..."}',
+        content='{"IF RCT 2023":[{"title":...,"href":...,"body":...}],"IF safety":[...]}',
         tool_call_id="call_123"
     )]
     """
 
-    if VERBOSE:
-        print("\n🔍 Executing search queries...")
+    log.debug("\n🔍 Executing search queries...")
 
     # Get the most recent AI message (has the tool_call with queries)
-    last_ai_message = state[-1]
-    tool_messages = []
-
-    # Process each tool call
-    # (Usually just one, but LLM could make multiple)
-    for tool_call in last_ai_message.tool_calls:
-
-        # Check if this is a tool call we handle
-        if tool_call["name"] in ["AnswerQuestion", "ReviseAnswer"]:
-            call_id = tool_call["id"]
-            search_queries = tool_call["args"].get("search_queries", [])
-
-            # Execute each search query
-            query_results = {}
-            for i, query in enumerate(search_queries, 1):
-                try:
-                    if VERBOSE:
-                        print(f"   [{i}] Searching: {query}")
-
-                    # Actually run the search!
-                    result = search_tool.run(query)
-
-                    # Limit result length to avoid token overload
-                    query_results[query] = result[:SEARCH_RESULT_LIMIT]
-
-                except Exception as e:
-                    if VERBOSE:
-                        print(f"   ⚠ Search error: {str(e)}")
-                    query_results[query] = f"Search unavailable: {str(e)}"
-
-            # Create ToolMessage with all search results
-            # JSON format makes it easy for LLM to parse
-            tool_messages.append(
-                ToolMessage(
-                    content=json.dumps(query_results, indent=2),
-                    tool_call_id=call_id  # Links to the AI's tool_call
-                )
-            )
+    # tool_calls is read once into a local and reused below
+    last_ai_message = state["messages"][-1]
+    tool_calls = last_ai_message.tool_calls
+
+    # Initial answer already complete? Skip the searches (and the revision:
+    # after_search routes to END when no ToolMessage was added).
+    # In round 1 this saves the revise call and the refined-query searches;
+    # the speculative prefetch has already run by now. Early searches are
+    # only started when the critique found gaps, so normally none are
+    # pending here - cancel() just drops any that haven't started yet
+    # (one already running in its worker thread can't be stopped)
+    if not _needs_more_research(last_ai_message):
+        log.debug("   ✓ Self-critique found nothing missing - skipping research")
+        for task in (state.get("pending_searches") or {}).values():
+            task.cancel()
+        return {"prefetched": {}, "pending_searches": {}}
+
+    # Results already fetched by prefetch_search (first round only)
+    prefetched = dict(state.get("prefetched") or {})
+    prefetched_keys = {_query_key(query) for query in prefetched}
+
+    # Everything searched earlier in this run: {normalized query: result}
+    searched = state.get("searched") or {}
+
+    # Searches generate already started while streaming: {key: Task}
+    pending = dict(state.get("pending_searches") or {})
+
+    # Collect the queries of each tool call we have a handler for
+    # (Usually just one call, but LLM could make multiple)
+    calls = []
+    for tool_call in tool_calls:
+        handler = _HANDLERS.get(tool_call["name"])
+        if handler:
+            calls.append((
+                tool_call["id"],
+                [
+                    query for query in handler(tool_call)
+                    if _query_key(query) not in prefetched_keys
+                ],
+            ))
+
+    # Fan out ONCE for all calls: every query of every call is in flight
+    # at the same time (awaiting call by call would serialize the calls)
+    all_queries = [query for _, queries in calls for query in queries]
+    results = await _search_all(all_queries, searched, pending)
+    search_count = len(all_queries)
+    newly_searched = _remember(results)
+
+    # One ToolMessage per call, sized up front and filled by position
+    tool_messages = [None] * len(calls)
+    for i, (call_id, queries) in enumerate(calls):
+        # Merge the prefetched results in (only into the first message)
+        query_results = {**prefetched, **{query: results[query] for query in queries}}
+        prefetched = {}
+
+        # Create ToolMessage with all search results
+        # JSON format makes it easy for LLM to parse
+        tool_messages[i] = ToolMessage(
+            content=_serialize(query_results),
+            tool_call_id=call_id  # Links to the AI's tool_call
+        )
+
+    # Early searches nobody needed (e.g. covered by the prefetch)
+    for task in pending.values():
+        task.cancel()
+
+    log.debug("   ✓ Completed %d searches", search_count)
+
+    return {
+        "messages": tool_messages,
+        "prefetched": {},
+        "searched": newly_searched,
+        "pending_searches": {},
+        "iteration": state.get("iteration", 0) + 1,
+    }
+
+
+# ============================================================================
+# PROMPT INPUTS
+# ============================================================================
 
-    if VERBOSE:
-        print(f"   ✓ Completed {len(search_queries)} searches")
+def _revision_inputs(messages: Sequence[BaseMessage]) -> Dict[str, str]:
+    """
+    Pick out ONLY what the revision/merge prompts need from the conversation
 
-    return tool_messages
+    WHAT IT DOES:
+    - question: the most recent HumanMessage
+    - draft:    args of the latest AI tool call (answer + critique), as JSON
+    - evidence: the ToolMessage(s) answering that tool call
+
+    WHY NOT THE WHOLE CONVERSATION:
+    Earlier drafts and earlier search rounds are already folded into the
+    latest draft. Re-sending them costs tokens on every call, and more so
+    each iteration.
+
+    EXAMPLE:
+    [Human, AI(draft1), Tool(r1), AI(draft2), Tool(r2)]
+    -> {"question": Human, "draft": draft2, "evidence": r2}
+    """
+
+    draft_index = next(
+        i for i in range(len(messages) - 1, -1, -1)
+        if isinstance(messages[i], AIMessage) and messages[i].tool_calls
+    )
+    draft_calls = messages[draft_index].tool_calls
+    evidence = [
+        msg.content for msg in messages[draft_index + 1:]
+        if isinstance(msg, ToolMessage)
+    ]
+
+    return {
+        "question": _last_question(messages),
+        "draft": _serialize(draft_calls[0]["args"]),
+        "evidence": "\n".join(evidence),
+    }
+
+
+# ============================================================================
+# REFERENCE DEDUPLICATION
+# ============================================================================
+
+_URL = re.compile(r"^(?:https?://|www\.)", re.IGNORECASE)
+
+
+def _reference_key(reference: str) -> str:
+    """
+    Exact-match key for a reference
+
+    URLs: scheme, "www.", fragment and trailing "/" dropped, host lowercased
+    ("https://www.PubMed.gov/123/#x" -> "pubmed.gov/123")
+    Text: case and whitespace normalized
+    """
+
+    reference = reference.strip()
+    if _URL.match(reference):
+        parts = urlsplit(reference if "://" in reference else "//" + reference)
+        host = parts.netloc.lower().removeprefix("www.")
+        key = host + parts.path.rstrip("/")
+        return f"{key}?{parts.query}" if parts.query else key
+    return " ".join(reference.lower().split())
+
+
+def _dedupe_references(response: AIMessage) -> AIMessage:
+    """
+    Drop duplicate and near-duplicate references from a revised answer
+
+    HOW:
+    1. Exact repeats are dropped first (cheap, no model needed).
+       URLs are compared by _reference_key, so "https://a.com/x/" and
+       "http://www.a.com/x" count as the same source
+    2. The remaining NON-URL references are embedded with the semantic
+       cache's model and clustered greedily: one is kept only if its cosine
+       similarity to every text reference kept so far is
+       < REFERENCE_DEDUPE_THRESHOLD
+
+    WHY NOT EMBED URLS:
+    Two URLs on the same host differ only in an id
+    ("pubmed.ncbi.nlm.nih.gov/123" vs "/456"), so their embeddings are
+    nearly identical even though they cite different papers.
+
+    EXAMPLE:
+    ["https://a.com", "https://a.com/", "Smith 2023", "Smith et al. 2023"]
+    -> ["https://a.com", "Smith 2023"]
+
+    If the embedding model can't be used, only step 1 is applied.
+    Edits the tool call args in place (before the message reaches state).
+    """
+
+    tool_calls = response.tool_calls
+    if not tool_calls:
+        return response
+
+    args = tool_calls[0]["args"]
+    unique = {}
+    for reference in args.get("references") or []:
+        unique.setdefault(_reference_key(reference), reference)
+    references = list(unique.values())
+
+    texts = [i for i, reference in enumerate(references) if not _URL.match(reference.strip())]
+    # search_cache.enabled is False once the model failed to load (already logged)
+    if SEMANTIC_CACHE_ENABLED and search_cache.enabled and len(texts) > 1:
+        try:
+            vectors = search_cache.embed([references[i] for i in texts])
+        except Exception as e:
+            log.warning("   ⚠ Reference embedding unavailable: %s", e)
+        else:
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+            kept = [0]
+            for i in range(1, len(texts)):
+                if np.max(vectors[kept] @ vectors[i]) < REFERENCE_DEDUPE_THRESHOLD:
+                    kept.append(i)
+            dropped = set(texts) - {texts[i] for i in kept}
+            references = [r for i, r in enumerate(references) if i not in dropped]
+
+    if "references" in args:
+        args["references"] = references
+    return response
+
+
+# ============================================================================
+# SHARED REVISOR CALL
+# ============================================================================
+
+async def _invoke_chain(chain: Runnable, inputs: Dict[str, str], action: str) -> AIMessage:
+    """
+    Call a revision-style chain and post-process its answer
+
+    WHAT IT DOES:
+    1. chain.ainvoke(inputs)
+    2. _dedupe_references() on the result (in a worker thread)
+    3. _log_tool_call() with `action` ("revised", "drafted", ...)
+
+    WHY ONE HELPER:
+    revise_answer, revise_branch and merge_revisions all made the same
+    call with the same follow-up steps. Tracing or memoizing those LLM
+    calls now only has to wrap this function.
+    (generate_initial_response streams instead, so it keeps its own loop)
+    """
+
+    response = await chain.ainvoke(inputs)
+    # Embedding is CPU work: keep it off the event loop
+    response = await asyncio.to_thread(_dedupe_references, response)
+    _log_tool_call(response, action)
+    return response
 
 
 # ============================================================================
 # NODE 3: REVISE ANSWER
 # ============================================================================
 
-def revise_answer(state: List[BaseMessage]) -> AIMessage:
+async def revise_answer(state: AgentState) -> Dict[str, List[AIMessage]]:
     """
     Revise answer incorporating search results
 
     WHAT IT DOES:
-    1. Receives full conversation (question + initial answer + search results)
-    2. Calls LLM with revisor_chain
+    1. Picks question + latest answer + search results from the conversation
+    2. Calls LLM with get_chains().revisor
     3. LLM creates improved answer using search findings
     4. Returns revised answer with references
 
     PARAMETERS:
-    - state: List[BaseMessage] - Full conversation
+    - state: AgentState - Full conversation in state["messages"]
       At this point: [HumanMessage, AIMessage, ToolMessage(s)]
 
     RETURNS:
-    - AIMessage with tool_calls containing revised response
+    - {"messages": [AIMessage]} - tool_calls contain the revised response
 
     WHY THIS WORKS:
-    The LLM sees:
-    - Original question (HumanMessage)
-    - Its first answer + self-critique (AIMessage)
-    - Search results (ToolMessage)
+    The LLM sees (via _revision_inputs, not the whole transcript):
+    - Original question
+    - Its latest answer + self-critique
+    - This round's search results
 
     So it can intelligently incorporate the new info to address gaps!
 
@@ -296,50 +1118,232 @@ def revise_answer(state: List[BaseMessage]) -> AIMessage:
     )
     """
 
-    if VERBOSE:
-        print("\n✍️  Revising answer with research findings...")
+    log.debug("\n✍️  Revising answer with research findings...")
 
-    # Invoke revisor chain with full conversation history
-    # MessagesPlaceholder inserts all state messages
-    # LLM sees question, initial answer, and search results
-    response = revisor_chain.invoke({"messages": state})
+    # Invoke revisor chain with just the fields it needs
+    # LLM sees question, latest answer, and this round's search results
+    # ainvoke: the whole graph runs on one event loop, no thread hand-off
+    response = await _invoke_chain(
+        get_chains().revisor, _revision_inputs(state["messages"]), "revised"
+    )
 
-    # Display info if verbose
-    if VERBOSE and response.tool_calls:
-        args = response.tool_calls[0]['args']
-        print(f"   ✓ Answer revised ({len(args['answer'])} chars)")
-        if args.get('references'):
-            print(f"   ✓ Added {len(args['references'])} references")
+    return {"messages": [response]}
 
-    return response
+
+def revise_answer_batch(message_lists: Sequence[Sequence[BaseMessage]]) -> List[AIMessage]:
+    """
+    Revise many independent conversations at once
+
+    WHAT IT DOES:
+    Same LLM call as revise_answer for N conversations (each ending with
+    its search results) in one get_chains().revisor.batch(), up to
+    MAX_PARALLEL_REQUESTS in flight. Not used by the graph.
+
+    RETURNS:
+    - One revised AIMessage per conversation, references deduplicated
+    """
+
+    responses = get_chains().revisor.batch(
+        [_revision_inputs(messages) for messages in message_lists],
+        config={"max_concurrency": MAX_PARALLEL_REQUESTS},
+    )
+    return [_dedupe_references(response) for response in responses]
 
 
 # ============================================================================
-# CONDITIONAL EDGE FUNCTION
+# NODE 4: PARALLEL REVISION BRANCHES
 # ============================================================================
 
-def should_continue(state: List[BaseMessage]) -> str:
+"""
+WHY BRANCHES:
+When a revision asks for several searches, they usually target DIFFERENT
+gaps. Those gaps can be researched and written up independently.
+
+So instead of one "execute_tools -> revise" round, the queries are split
+into disjoint slices and each slice gets its own branch that searches AND
+revises at the same time as the others. A final merge call combines the
+drafts.
+
+The merged round still adds ONE ToolMessage (all of the round's results)
+and ONE AIMessage to the conversation, exactly like a normal round.
+"""
+
+def _split_queries(queries: List[str], branches: int) -> List[List[str]]:
+    """Deal queries round-robin into at most `branches` non-empty slices"""
+    count = min(len(queries), branches)
+    return [queries[i::count] for i in range(count)]
+
+
+async def revise_branch(state: AgentState) -> Dict[str, List[Dict[str, object]]]:
+    """
+    Research ONE slice of the queries and write a revision for it
+
+    PARAMETERS:
+    - state: Send payload with
+      - messages: conversation so far (ends with the AI message to answer)
+      - branch_queries: this branch's slice of search_queries
+      - searched: results from earlier rounds (reused, not re-searched)
+
+    RETURNS:
+    - {"branch_results": [{"query_results": {...}, "draft": AIMessage}]}
+      (collected across branches by the collect_branches reducer)
+    """
+
+    messages = state["messages"]
+    queries = state["branch_queries"]
+    call_id = messages[-1].tool_calls[0]["id"]
+
+    log.debug("\n🌿 Branch researching %d queries: %s", len(queries), queries)
+
+    query_results = await _search_all(queries, state.get("searched") or {})
+
+    tool_message = ToolMessage(
+        content=_serialize(query_results),
+        tool_call_id=call_id
+    )
+
+    # ainvoke (not invoke) so the branches' LLM calls actually overlap
+    draft = await _invoke_chain(
+        get_chains().revisor, _revision_inputs(messages + [tool_message]), "drafted"
+    )
+
+    return {"branch_results": [{"query_results": query_results, "draft": draft}]}
+
+
+async def merge_revisions(state: AgentState) -> Dict[str, object]:
+    """
+    Merge the parallel branch drafts into one revised answer
+
+    WHAT IT DOES:
+    1. Combines every branch's search results into ONE ToolMessage
+       (answering the AI message the branches started from)
+    2. Asks the LLM to merge the branch drafts (get_chains().merge)
+    3. Clears branch_results for the next round
+
+    RETURNS:
+    - {"messages": [ToolMessage, AIMessage], "branch_results": None,
+       "searched": {...}, "iteration": n + 1}
+    """
+
+    log.debug("\n🔗 Merging parallel revisions...")
+
+    branches = state["branch_results"]
+    call_id = state["messages"][-1].tool_calls[0]["id"]
+
+    query_results = {}
+    for branch in branches:
+        query_results.update(branch["query_results"])
+
+    tool_message = ToolMessage(
+        content=_serialize(query_results),
+        tool_call_id=call_id
+    )
+
+    drafts = [
+        branch["draft"].tool_calls[0]["args"]
+        for branch in branches
+        if branch["draft"].tool_calls
+    ]
+
+    response = await _invoke_chain(
+        get_chains().merge,
+        {
+            **_revision_inputs(state["messages"] + [tool_message]),
+            "drafts": _serialize(drafts),
+        },
+        f"merged from {len(drafts)} drafts",
+    )
+
+    return {
+        "messages": [tool_message, response],
+        "branch_results": None,
+        "searched": _remember(query_results),
+        "iteration": state.get("iteration", 0) + 1,
+    }
+
+
+# ============================================================================
+# CONDITIONAL EDGE FUNCTIONS
+# ============================================================================
+
+def _needs_more_research(message: BaseMessage) -> bool:
+    """
+    Did the latest answer's self-critique find anything worth searching for?
+
+    FALSE WHEN:
+    - reflection.missing is blank or shorter than MIN_REFLECTION_CHARS
+      (e.g. "None", "Nothing significant")
+    - or there are no search queries to run
+    """
+
+    tool_calls = getattr(message, "tool_calls", None)
+    if not tool_calls:
+        return False
+
+    args = tool_calls[0]["args"]
+    return _critique_has_gaps(args.get("reflection") or {}) and bool(args.get("search_queries"))
+
+
+def _critique_has_gaps(reflection: Dict[str, Any]) -> bool:
+    """Is reflection.missing long enough to be a real gap (>= MIN_REFLECTION_CHARS)?"""
+    missing = (reflection.get("missing") or "").strip()
+    return len(missing) >= MIN_REFLECTION_CHARS
+
+
+def after_search(state: AgentState) -> str:
+    """
+    Route after "execute_tools": revise with the results, or stop
+
+    RETURNS:
+    - "revise" = searches ran (the last message is a ToolMessage)
+    - END = execute_tools skipped searching (nothing was missing),
+      so the current answer is final
+    """
+
+    if isinstance(state["messages"][-1], ToolMessage):
+        return "revise"
+    return END
+
+
+def dispatch_start(state: AgentState) -> List[Send]:
+    """
+    Fan out from START: draft the answer AND prefetch a search in parallel
+
+    RETURNS:
+    - [Send("generate", state), Send("prefetch", state)]
+      Both nodes run in the same step; execute_tools waits for both.
+    """
+
+    return [Send("generate", state), Send("prefetch", state)]
+
+
+def should_continue(state: AgentState) -> Union[str, List[Send]]:
     """
     Decide whether to continue revising or end
 
     WHAT IT DOES:
     Counts how many times we've searched and revised.
-    If we've hit MAX_ITERATIONS, stop. Otherwise, continue.
+    If we've hit MAX_ITERATIONS, stop. Otherwise, continue - in parallel
+    branches if there are several queries to split up.
 
     PARAMETERS:
-    - state: List[BaseMessage] - Full conversation
+    - state: AgentState - Full conversation in state["messages"]
 
     RETURNS:
     - "execute_tools" = continue another iteration
+    - [Send("revise_branch", ...), ...] = continue with parallel branches
     - END = stop and return final answer
 
-    WHY COUNT TOOLMESSAGES:
-    Each ToolMessage represents one search execution.
-    So counting them = counting iterations.
+    WHY A COUNTER IN STATE:
+    Each search round (execute_tools, or a merged set of branches)
+    bumps state["iteration"]. Reading it is O(1) - no need to walk
+    the whole conversation counting ToolMessages on every check.
+    (A ContextVar wouldn't work: LangGraph runs each node in its own
+    context copy, so the increment would never be seen here.)
 
     FLOW:
-    Iteration 1: [Human, AI, Tool] -> count=1 -> continue
-    Iteration 2: [Human, AI, Tool, AI, Tool] -> count=2 -> END
+    Iteration 1: [Human, AI, Tool] -> iteration=1 -> continue
+    Iteration 2: [Human, AI, Tool, AI, Tool] -> iteration=2 -> END
 
     WHY LIMIT ITERATIONS:
     - Prevents infinite loops
@@ -347,20 +1351,41 @@ def should_continue(state: List[BaseMessage]) -> str:
     - Prevents diminishing returns (answer gets good enough)
     """
 
-    from langgraph.graph import END
-    from config import MAX_ITERATIONS
-
-    # Count ToolMessages to track iterations
-    tool_count = sum(isinstance(msg, ToolMessage) for msg in state)
+    # Completed search rounds so far
+    tool_count = state.get("iteration", 0)
 
     if tool_count >= MAX_ITERATIONS:
-        if VERBOSE:
-            print(f"\n🏁 Reached max iterations ({MAX_ITERATIONS}). Finishing...")
+        log.debug("\n🏁 Reached max iterations (%d). Finishing...", MAX_ITERATIONS)
+        return END
+
+    # Diminishing returns: nothing left to look up
+    last = state["messages"][-1]
+    if not _needs_more_research(last):
+        log.debug("\n🏁 Self-critique found nothing missing. Finishing...")
         return END
-    else:
-        if VERBOSE:
-            print(f"\n🔄 Iteration {tool_count} complete. Continuing...")
-        return "execute_tools"
+
+    # One spelling per _query_key, so "IF autophagy" and "if autophagy?"
+    # can't land in different branches (two searches, two drafts)
+    queries = last.tool_calls[0]["args"].get("search_queries", [])
+    unique = {}
+    for query in queries:
+        unique.setdefault(_query_key(query), query)
+    slices = _split_queries(list(unique.values()), PARALLEL_REVISION_BRANCHES)
+
+    if len(slices) > 1:
+        log.debug("\n🔄 Iteration %d complete. Continuing with %d parallel revisions...",
+                  tool_count, len(slices))
+        return [
+            Send("revise_branch", {
+                "messages": state["messages"],
+                "branch_queries": branch,
+                "searched": state.get("searched") or {},
+            })
+            for branch in slices
+        ]
+
+    log.debug("\n🔄 Iteration %d complete. Continuing...", tool_count)
+    return "execute_tools"
 
 
 # ============================================================================
@@ -368,8 +1393,18 @@ def should_continue(state: List[BaseMessage]) -> str:
 # ============================================================================
 
 __all__ = [
+    'get_llm',
+    'get_chains',
+    'warm_start',
     'generate_initial_response',
+    'generate_initial_response_batch',
+    'prefetch_search',
     'execute_tools',
     'revise_answer',
+    'revise_answer_batch',
+    'revise_branch',
+    'merge_revisions',
+    'dispatch_start',
+    'after_search',
     'should_continue'
 ]
@@ -8,15 +8,52 @@ WHY THIS FILE:
 
 HOW PROMPTS WORK:
 - Define the agent's personality and instructions
-- MessagesPlaceholder allows conversation history to be inserted
-- System message sets context, user messages come from conversation
+- {placeholders} receive ONLY the fields each step needs
+  ({question}, {draft}, {evidence}) instead of the whole conversation
+- System message sets context, the human message carries those fields
 
 ANALOGY:
 These are like instruction manuals given to the agent.
 "You are X, do Y, remember to Z"
 """
 
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from datetime import date
+
+from langchain_core.prompts import ChatPromptTemplate
+
+
+# ============================================================================
+# SHARED PARTIALS
+# ============================================================================
+
+def _current_date() -> str:
+    """Today's date, e.g. "2025-03-14" (evaluated on every format call)"""
+    return date.today().isoformat()
+
+
+"""
+WHY .partial(current_date=_current_date):
+- The templates below are parsed ONCE, here at import time
+- Passing a CALLABLE (not a value) means each request still sees
+  today's date, without rebuilding or re-parsing the template
+- The date helps the LLM judge what "recent" research means
+"""
+
+
+"""
+WHY STATIC FIRST, DYNAMIC LAST (PROMPT CACHING):
+Gemini caches request prefixes automatically (implicit caching on the 2.5
+models): if a request starts with the exact same tokens as a recent one,
+that part is billed at a discount and skips recomputation.
+So every prompt is ordered from most to least stable:
+1. Tool declarations (identical for every chain - see nodes.py)
+2. System instructions (fixed text)
+3. Today's date (LAST line of the system text - changes once a day)
+4. The question / draft / evidence (changes every request)
+
+RULE: never put timestamps, ids or other per-request values above the
+end of the system text - one changed token invalidates everything after it.
+"""
 
 
 # ============================================================================
@@ -63,12 +100,13 @@ STEP 3: Generate Research Queries
 - Focus on filling the gaps you identified
 
 IMPORTANT: Don't be gentle on yourself! Real critique leads to better answers.
+
+Today's date is {current_date}.
 """
     ),
-    MessagesPlaceholder(variable_name="messages"),
-    # ^ This is where the conversation history gets inserted
-    # e.g., [HumanMessage("What are the benefits of IF?")]
-])
+    ("human", "{question}"),
+    # ^ The user's question, e.g. "What are the benefits of IF?"
+]).partial(current_date=_current_date)
 
 
 # ============================================================================
@@ -84,12 +122,22 @@ Tells the LLM to:
 3. Add citations
 4. Create improved answer
 
-The conversation history at this point includes:
-- Original question
-- Original answer with critique
-- Search results (as ToolMessages)
+Inputs (NOT the whole conversation - see "WHY FIELDS" below):
+- {question}: the original question
+- {draft}: the latest answer with its critique (JSON)
+- {evidence}: this round's search results (JSON)
 """
 
+# Shared by the revision and merge prompts
+_REVISION_CONTEXT = """QUESTION:
+{question}
+
+YOUR LATEST ANSWER AND SELF-CRITIQUE (JSON):
+{draft}
+
+NEW SEARCH RESULTS (JSON):
+{evidence}"""
+
 revision_prompt = ChatPromptTemplate.from_messages([
     (
         "system",
@@ -124,40 +172,91 @@ STEP 5: Maintain Quality
 - Distinguish correlation from causation where relevant
 
 IMPORTANT: Your revised answer should be noticeably more evidence-based than your first draft.
+
+Today's date is {current_date}.
 """
     ),
-    MessagesPlaceholder(variable_name="messages"),
-    # ^ At this point, messages includes:
-    # 1. HumanMessage (question)
-    # 2. AIMessage (initial answer with tool_call)
-    # 3. ToolMessage (search results)
-])
+    ("human", _REVISION_CONTEXT),
+]).partial(current_date=_current_date)
 
 
 # ============================================================================
-# WHY MESSAGESPLACEHOLDER?
+# MERGE PROMPT
 # ============================================================================
 
 """
-MessagesPlaceholder is a slot where conversation history goes.
+WHY THIS PROMPT:
+Used in the "merge_revisions" node when a revision round was split into
+parallel branches (each branch researched a different slice of the queries).
+Tells the LLM to:
+1. Read every branch's revised draft
+2. Combine them into ONE answer, keeping the best evidence from each
+3. Union and dedupe the references
+
+Inputs:
+- {question}, {draft}: as for the revision prompt
+- {evidence}: ALL search results from this round (every branch's)
+- {drafts}: the branch drafts as JSON
+"""
+
+merge_prompt = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        """You are a helpful research assistant merging parallel revisions of your answer.
+
+CONTEXT:
+Your previous answer had several gaps. Each gap was researched separately, and a revised draft was written for each.
+
+NOW YOUR TASK:
+Merge the drafts into ONE improved, evidence-based answer.
+
+STEP 1: Combine Evidence
+- Keep the specific data, statistics, and findings from EVERY draft
+- Where drafts overlap, keep the more specific, better-supported version
+- Where drafts conflict, prefer the one backed by the search results
+
+STEP 2: Keep It Focused
+- Keep 2-3 paragraphs (concise but comprehensive)
+- Drop repetition between drafts
+
+STEP 3: Merge References
+- Combine all drafts' references, removing duplicates
+
+STEP 4: Reflect Again
+- Critique the MERGED answer (what's still missing or superfluous)
+- Suggest new search queries for what's still missing
+
+Today's date is {current_date}.
+"""
+    ),
+    (
+        "human",
+        _REVISION_CONTEXT + "\n\nREVISED DRAFTS TO MERGE (JSON):\n{drafts}"
+    ),
+]).partial(current_date=_current_date)
 
-Without it, the LLM wouldn't see:
-- What question was asked
-- What it previously answered
-- What the search results were
 
-It's like showing the LLM a chat transcript so it has context.
+# ============================================================================
+# WHY FIELDS INSTEAD OF THE WHOLE CONVERSATION?
+# ============================================================================
+
+"""
+The graph still keeps the full conversation in state["messages"]
+(that's what callers read the answers from), but the prompts no longer
+replay it. By iteration 2 the transcript holds every earlier draft and
+every earlier round of search results - all re-sent, and re-billed, on
+each LLM call.
+
+The latest draft already folds in what earlier rounds found (and cites
+it in its references), so each step only needs:
 
-Example flow:
-1. Generate node invokes initial_prompt with:
-   messages = [HumanMessage("What are benefits of IF?")]
+1. Generate node:
+   question = "What are benefits of IF?"
 
-2. Revise node invokes revision_prompt with:
-   messages = [
-       HumanMessage("What are benefits of IF?"),
-       AIMessage(tool_calls=[...]),  # Initial answer
-       ToolMessage(content="...")     # Search results
-   ]
+2. Revise node:
+   question = "What are benefits of IF?"
+   draft    = '{"answer": "...", "reflection": {...}, "search_queries": [...]}'
+   evidence = '{"IF RCT 2023": [{"title": ..., "href": ..., "body": ...}]}'
 
-The LLM sees the full conversation and can provide coherent responses.
+nodes.py builds these from state["messages"] (see _revision_inputs()).
 """
@@ -0,0 +1,96 @@
+"""
+Graph State for Reflection Agent
+
+WHY THIS FILE:
+- Defines the data that flows between graph nodes
+- One place to see every field the workflow reads or writes
+- Kept separate from models.py (those are LLM tool schemas, not graph state)
+
+HOW IT WORKS:
+- AgentState is a TypedDict: each key is a "channel" in the graph
+- Nodes return a dict with only the keys they want to update
+- Annotated[..., reducer] tells LangGraph HOW to combine updates
+  (e.g. add_messages APPENDS new messages instead of replacing the list)
+
+ANALOGY:
+The state is a shared whiteboard.
+Each worker (node) reads the whole board and writes only in its own boxes.
+"""
+
+import asyncio
+from typing import Annotated, Any, Dict, List, Optional, TypedDict
+
+from langchain_core.messages import BaseMessage
+from langgraph.graph.message import add_messages
+
+
+# ============================================================================
+# REDUCERS
+# ============================================================================
+
+def collect_branches(
+    current: Optional[List[Dict[str, Any]]],
+    update: Optional[List[Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """
+    Combine results from parallel revision branches
+
+    WHY A CUSTOM REDUCER:
+    - Parallel branches write in the SAME step -> their lists are appended
+    - Writing None clears the list (done after merging, ready for next round)
+    """
+
+    if update is None:
+        return []
+    return (current or []) + update
+
+
+def merge_dicts(
+    current: Optional[Dict[str, Any]],
+    update: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Merge dict updates into the existing dict (update wins on conflicts)"""
+    return {**(current or {}), **(update or {})}
+
+
+# ============================================================================
+# AGENT STATE
+# ============================================================================
+
+class AgentState(TypedDict, total=False):
+    """
+    Everything the Reflection Agent carries between nodes
+
+    FIELDS:
+    - messages: Conversation history (Human, AI tool calls, Tool results)
+      Reducer: add_messages -> node updates are appended
+    - prefetched: {query: result} from the speculative search of the raw
+      question. Written by "prefetch", consumed (and cleared) by "execute_tools"
+    - searched: {normalized query: result} for every query searched so far
+      in this run. Reducer: merge_dicts. Lets later rounds skip repeats
+    - pending_searches: {normalized query: asyncio.Task} for searches that
+      generate started while its response was still streaming.
+      Consumed (and cleared) by "execute_tools".
+      NOTE: live Task objects - fine in memory, not checkpoint-serializable
+    - iteration: Number of completed search rounds. Bumped by
+      "execute_tools" and "merge_revisions", read by should_continue
+    - branch_queries: The slice of search queries ONE parallel revision
+      branch should research (only set in the Send payload for that branch)
+    - branch_results: [{"query_results": {...}, "draft": AIMessage}, ...]
+      one entry per finished branch. Reducer: collect_branches
+    """
+
+    messages: Annotated[List[BaseMessage], add_messages]
+    prefetched: Dict[str, Any]
+    searched: Annotated[Dict[str, Any], merge_dicts]
+    pending_searches: Dict[str, asyncio.Task]
+    iteration: int
+    branch_queries: List[str]
+    branch_results: Annotated[List[Dict[str, Any]], collect_branches]
+
+
+# ============================================================================
+# EXPORTS
+# ============================================================================
+
+__all__ = ['AgentState', 'collect_branches', 'merge_dicts']
@@ -0,0 +1,11 @@
+"""
+Shared pytest setup
+
+The modules live flat in the repo root (imported as `import nodes`,
+`import cache`, ...), so the root goes on sys.path first.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,102 @@
+"""
+Tests for SemanticCache bookkeeping (no embedding model needed)
+
+A fake encoder maps text to a fixed random vector, ignoring "?" so
+"alpha?" misses the exact-match path but hits the vector path.
+"""
+
+import zlib
+
+import numpy as np
+
+from cache import SemanticCache
+
+
+class FakeEncoder:
+    def encode(self, text):
+        if isinstance(text, list):
+            return np.stack([self.encode(t) for t in text])
+        seed = zlib.crc32(text.replace("?", "").encode())
+        return np.random.default_rng(seed).standard_normal(16).astype(np.float32)
+
+
+def _cache(**kwargs):
+    cache = SemanticCache(path=None, **kwargs)
+    cache._encoder = FakeEncoder()
+    return cache
+
+
+def _assert_consistent(cache):
+    """Every row is reachable from both indexes, and nothing else is"""
+    n = len(cache)
+    assert sorted(cache._exact.values()) == list(range(n))
+    assert set(cache._index._keys) == set(range(n))
+    for row, query in enumerate(cache._queries):
+        assert cache._exact[cache._exact_key(query)] == row
+
+
+def test_exact_and_semantic_hits():
+    cache = _cache(threshold=0.99)
+    cache.put("alpha", "A")
+    assert cache.get("  ALPHA ") == "A"   # exact-match fast path
+    assert cache.get("alpha?") == "A"     # same vector, different text
+    assert cache.get("beta") is None
+
+
+def test_lru_eviction_swap_remove_keeps_indexes_in_sync():
+    cache = _cache(max_entries=3, lsh_min_entries=1, threshold=0.99)
+    for name in ("a", "b", "c"):
+        cache.put(name, name.upper())
+
+    cache._last_used[1] = cache._last_used[2] = cache._last_used[0] + 1
+    cache.put("d", "D")  # evicts "a": "d" moves into the freed row
+
+    _assert_consistent(cache)
+    assert cache.get("a") is None
+    for name in ("b", "c", "d"):
+        assert cache.get(name) == name.upper()
+        assert cache.get(name + "?") == name.upper()  # through LSH + vectors
+
+
+def test_expired_entry_is_removed():
+    cache = _cache(ttl=60, lsh_min_entries=1)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    cache._created[0] -= 120
+
+    assert cache.get("a") is None
+    _assert_consistent(cache)
+    assert cache._queries == ["b"]
+    assert cache.get("b?") == "B"
+
+
+def test_failed_model_load_disables_cache():
+    cache = SemanticCache(path=None)
+    calls = []
+
+    def broken_load():
+        calls.append(1)
+        raise ImportError("no sentence_transformers")
+
+    cache._load_model = broken_load
+    try:
+        cache.put("a", "A")
+    except ImportError:
+        pass
+    assert not cache.enabled
+    cache.put("a", "A")
+    assert cache.get("a") is None
+    assert calls == [1]  # loaded once, never retried
+
+
+def test_pending_vectors_are_dropped_and_bounded():
+    cache = _cache(threshold=0.99)
+    cache.put("alpha", "A")
+    assert cache.get("beta") is None
+    cache.discard("beta")  # the search for "beta" failed
+    assert cache._pending == {}
+
+    for i in range(cache.MAX_PENDING + 5):
+        cache.get(f"miss {i}")
+    assert len(cache._pending) == cache.MAX_PENDING
+    assert "miss 0" not in cache._pending
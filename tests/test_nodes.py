@@ -0,0 +1,93 @@
+"""
+Tests for the pure helpers in nodes.py
+
+No LLM or network calls: only the functions that shape prompt inputs.
+"""
+
+import hashlib
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from nodes import _completed_queries, _completed_reflection, _revision_inputs, _serialize
+from prompts import revision_prompt
+
+
+# ============================================================================
+# DETERMINISTIC PROMPT INPUTS
+# ============================================================================
+
+def _conversation(args, results):
+    return [
+        HumanMessage(content="What are the benefits of IF?"),
+        AIMessage(content="", tool_calls=[{"name": "AnswerQuestion", "args": args, "id": "c1"}]),
+        ToolMessage(content=_serialize(results), tool_call_id="c1"),
+    ]
+
+
+def _prompt_hash(messages):
+    rendered = revision_prompt.format_messages(**_revision_inputs(messages))
+    text = "\n".join(f"{m.type}:{m.content}" for m in rendered)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def test_serialize_ignores_key_order():
+    a = {"q2": [{"title": "t", "href": "h", "body": "é"}], "q1": "x"}
+    b = {"q1": "x", "q2": [{"body": "é", "href": "h", "title": "t"}]}
+    assert _serialize(a) == _serialize(b)
+    assert _serialize(a) == '{"q1":"x","q2":[{"body":"é","href":"h","title":"t"}]}'
+
+
+def test_revision_prompt_bytes_are_stable():
+    reflection = {"missing": "RCT data", "superfluous": "none"}
+    first = _conversation(
+        {"answer": "A", "reflection": reflection, "search_queries": ["IF RCT"]},
+        {"IF RCT": [{"title": "t", "href": "h", "body": "b"}], "IF": "y"},
+    )
+    second = _conversation(
+        {"search_queries": ["IF RCT"], "reflection": dict(reversed(reflection.items())), "answer": "A"},
+        {"IF": "y", "IF RCT": [{"body": "b", "href": "h", "title": "t"}]},
+    )
+    assert _prompt_hash(first) == _prompt_hash(second)
+
+
+def test_revision_inputs_use_latest_round_only():
+    messages = _conversation({"answer": "old"}, {"q1": "r1"}) + [
+        AIMessage(content="", tool_calls=[{"name": "ReviseAnswer", "args": {"answer": "new"}, "id": "c2"}]),
+        ToolMessage(content="r2", tool_call_id="c2"),
+    ]
+    inputs = _revision_inputs(tuple(messages))
+    assert inputs == {
+        "question": "What are the benefits of IF?",
+        "draft": '{"answer":"new"}',
+        "evidence": "r2",
+    }
+
+
+# ============================================================================
+# STREAMED QUERY PARSING
+# ============================================================================
+
+def test_completed_queries_skips_unfinished_element():
+    buffer = '{"answer": "...", "search_queries": ["IF RCT 2023", "IF saf'
+    assert _completed_queries(buffer) == ["IF RCT 2023"]
+
+
+def test_completed_queries_handles_escapes_and_closed_list():
+    buffer = '{"search_queries": [ "say \\"hi\\"" ,"b, c"], "references": ["x"'
+    assert _completed_queries(buffer) == ['say "hi"', "b, c"]
+
+
+def test_completed_queries_before_field_starts():
+    assert _completed_queries('{"answer": "A", "search_qu') == []
+
+
+def test_completed_reflection_waits_for_closing_brace():
+    buffer = '{"answer": "A", "reflection": {"missing": "RCTs", "superfluous": "x'
+    assert _completed_reflection(buffer) is None
+    buffer += '"}, "search_queries": ["q'
+    assert _completed_reflection(buffer) == {"missing": "RCTs", "superfluous": "x"}
+
+
+def test_completed_reflection_ignores_escaped_text_in_answer():
+    buffer = '{"answer": "see \\"reflection\\": {} above", "refl'
+    assert _completed_reflection(buffer) is None
@@ -0,0 +1,17 @@
+"""Tests for the AgentState reducers"""
+
+from state import collect_branches, merge_dicts
+
+
+def test_collect_branches_appends_parallel_updates():
+    current = collect_branches(None, [{"draft": 1}])
+    assert collect_branches(current, [{"draft": 2}]) == [{"draft": 1}, {"draft": 2}]
+
+
+def test_collect_branches_none_clears():
+    assert collect_branches([{"draft": 1}], None) == []
+
+
+def test_merge_dicts_update_wins():
+    assert merge_dicts({"a": 1, "b": 2}, {"b": 3}) == {"a": 1, "b": 3}
+    assert merge_dicts(None, None) == {}
@@ -17,7 +17,22 @@ CURRENT TOOLS:
 - DuckDuckGo search (free, no API key needed!)
 """
 
-from langchain_community.tools import DuckDuckGoSearchRun
+import asyncio
+import random
+import threading
+import time
+from typing import Dict, List
+
+from duckduckgo_search import DDGS
+from duckduckgo_search.exceptions import RatelimitException
+from langchain_core.tools import StructuredTool
+
+from config import (
+    MAX_CONCURRENT_SEARCHES,
+    MAX_SEARCH_RESULTS,
+    SEARCH_MAX_RETRIES,
+    SEARCH_BACKOFF_SECONDS,
+)
 
 
 # ============================================================================
@@ -35,11 +50,100 @@ ALTERNATIVES:
 - TavilySearchResults (better quality, requires API key)
 - GoogleSearchAPIWrapper (requires API key)
 - WikipediaQueryRun (for encyclopedic info)
+
+WHY NOT DuckDuckGoSearchRun:
+It opens a brand new DDGS session (fresh TCP/TLS handshake) for every
+single query. Here each worker thread keeps ONE session alive and reuses
+it, so the handshake is paid once instead of per search.
+
+WHY max_results (config.MAX_SEARCH_RESULTS):
+DuckDuckGoSearchRun always fetched 5 hits and joined them into one blob,
+and later hits were mostly cut off by the truncation anyway.
+Asking DDGS for only the hits we keep means fewer result pages to
+download and parse, and a smaller revise prompt.
 """
 
-# Initialize DuckDuckGo search
-# This creates a callable tool: search_tool.run("query") -> results
-search_tool = DuckDuckGoSearchRun()
+# One DDGS session per thread
+# WHY PER THREAD: async searches run in a thread pool (asyncio.to_thread);
+# the pool reuses its threads, so each keeps its warm connection
+_local = threading.local()
+
+# Cap on DuckDuckGo requests in flight for the WHOLE process
+# WHY HERE: every search (prefetch, early searches, execute_tools,
+# branches, and all runs of a run_agents batch) ends up in _text_search,
+# so one semaphore enforces the rate-limit protection everywhere.
+# A threading (not asyncio) semaphore, because the calls run in worker
+# threads and different runs may use different event loops
+_in_flight = threading.BoundedSemaphore(MAX_CONCURRENT_SEARCHES)
+
+
+def _client() -> DDGS:
+    """This thread's DDGS session (created on first use, then reused)"""
+    client = getattr(_local, "client", None)
+    if client is None:
+        client = _local.client = DDGS()
+    return client
+
+
+def _text_search(query: str) -> List[Dict[str, str]]:
+    """
+    One DuckDuckGo text search
+
+    RETURNS:
+    - List of hits: [{"title": ..., "href": ..., "body": ...}, ...]
+      (empty list if nothing was found)
+
+    WHY A LIST (not one joined string):
+    Callers can trim each snippet BEFORE serializing, and the URLs
+    stay available for the revision step's references.
+
+    Waits for a free slot if MAX_CONCURRENT_SEARCHES are already running
+    (retry backoff sleeps happen outside, without holding a slot).
+    """
+    with _in_flight:
+        return _client().text(query, max_results=MAX_SEARCH_RESULTS) or []
+
+
+def _backoff(attempt: int) -> float:
+    """
+    Seconds to wait before retry number `attempt` (0-based)
+
+    Exponential backoff with "full jitter": a random wait up to
+    base * 2^attempt, so concurrent searches don't all retry in lockstep.
+    """
+    return random.uniform(0, SEARCH_BACKOFF_SECONDS * 2 ** attempt)
+
+
+def search(query: str) -> List[Dict[str, str]]:
+    """Search DuckDuckGo, retrying with backoff when rate-limited"""
+    for attempt in range(SEARCH_MAX_RETRIES):
+        try:
+            return _text_search(query)
+        except RatelimitException:
+            time.sleep(_backoff(attempt))
+    return _text_search(query)  # Last try: let the error reach the caller
+
+
+async def async_search(query: str) -> List[Dict[str, str]]:
+    """Async version of search() - the blocking call runs in a worker thread"""
+    for attempt in range(SEARCH_MAX_RETRIES):
+        try:
+            return await asyncio.to_thread(_text_search, query)
+        except RatelimitException:
+            await asyncio.sleep(_backoff(attempt))
+    return await asyncio.to_thread(_text_search, query)
+
+
+# Wrap as a LangChain tool
+# This creates a callable tool:
+#   search_tool.invoke("query")         -> [{"title", "href", "body"}, ...]
+#   await search_tool.ainvoke("query")  -> same (uses async_search)
+search_tool = StructuredTool.from_function(
+    func=search,
+    coroutine=async_search,
+    name="duckduckgo_search",
+    description="Search DuckDuckGo for current information. Input should be a search query.",
+)
 
 
 # ============================================================================
@@ -52,8 +156,8 @@ In the execute_tools node, we do:
     search_queries = ["intermittent fasting RCT 2023", "IF safety studies"]
 
     for query in search_queries:
-        result = search_tool.run(query)
-        # result is a string with search snippets
+        result = await search_tool.ainvoke(query)
+        # result is a list of hits: [{"title", "href", "body"}, ...]
 
 The agent doesn't directly call the search tool!
 Instead: